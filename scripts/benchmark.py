@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 9:20 p.m.
+# @Author  : young wang
+# @FileName: benchmark.py
+# @Software: PyCharm
+
+"""this script benchmarks the deconvolution pipeline stage by stage on
+synthetic data (misc/synthetic.py) in the shapes of the real datasets
+(25,000 x 1460 raw interferograms, 330 x 512 frames, 330 tap PSF), writes the timings to
+JSON and flags regressions against a previous result, e.g.
+
+python benchmark.py --output ../benchmarks/new.json --compare ../benchmarks/old.json
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+import numpy as np
+from contextlib import contextmanager
+from pathlib import Path
+from sporco.admm import cbpdn
+from misc import processing, quality, learning, synthetic
+
+# Module level constants
+n_raw, n_samples = 25000, 1460
+depth, width = 330, 512
+start, decimation_factor = 420, 20
+lmbda, w_lmbda, speckle_weight = 0.05, 0.05, 0.1
+
+
+@contextmanager
+def dataset(s, file_name='synthetic'):
+    '''a temporary ../data/file_name in the pickled [lines x depth]
+    layout that load_data reads, with the working directory moved next to it
+    '''
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        Path(root, 'data').mkdir()
+        Path(root, 'scripts').mkdir()
+        with open(Path(root, 'data', file_name), 'wb') as f:
+            pickle.dump(s.T, f)
+            f.close()
+        os.chdir(Path(root, 'scripts'))
+        try:
+            yield file_name
+        finally:
+            os.chdir(cwd)
+
+
+def measure(function, repeat):
+    '''run once to warm up, then return the timings of repeat runs'''
+    function()
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - t)
+    return {'min': min(timings), 'median': float(np.median(timings)), 'repeat': repeat}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline, threshold):
+    '''ratio of the best time of every case against the baseline, the
+    minimum being the least affected by load on the machine. Regressions
+    are cases slower by more than threshold (relative)
+    '''
+    rows, regressions = [], []
+    for name, result in results.items():
+        if name not in baseline:
+            rows.append((name, result['min'], None, None, 'new'))
+            continue
+        ratio = result['min'] / baseline[name]['min']
+        flag = 'REGRESSION' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else '')
+        if flag == 'REGRESSION':
+            regressions.append(name)
+        rows.append((name, result['min'], baseline[name]['min'], ratio, flag))
+    return rows, regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None, help='JSON result file, default ../benchmarks/<commit>.json')
+    parser.add_argument('--compare', default=None, help='JSON result of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown flagged as regression')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--lines', type=int, default=n_raw, help='raw interferogram lines')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore', FutureWarning)
+    np.seterr(divide='ignore')
+
+    D = synthetic.load_psf('finger')
+    raw, _ = synthetic.raw(D, args.lines, seed=0)
+    s, x = synthetic.frame(D, width, seed=1)
+    s_full = np.repeat(s, decimation_factor, axis=1)
+    std = n_samples * 0.1
+
+    opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                      'MaxMainIter': 20, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                      'RelaxParam': 1.515, 'AutoRho': {'Enabled': True}})
+
+    x_log = 10 * np.log10(abs(s) ** 2)
+    region_h = quality.ROI(100, 100, 100, 80, x_log)
+    region_b = quality.ROI(100, 250, 100, 80, x_log)
+
+    cases = {'Aline_R': lambda: processing.Aline_R(raw, start),
+             'Aline_G': lambda: processing.Aline_G(raw, start, std),
+             'Aline_H': lambda: processing.Aline_H(raw, start),
+             'getWeight': lambda: processing.getWeight(s, D, w_lmbda, speckle_weight,
+                                                       Paddging=True, opt_par=opt_par),
+             'make_sparse_representation': lambda: processing.make_sparse_representation(s, D, lmbda, w_lmbda,
+                                                                                         speckle_weight),
+             'log_gCNR': lambda: quality.log_gCNR(10 ** (region_h / 10), 10 ** (region_b / 10)),
+             'DictLearn (20 iterations)': lambda: learning.batch_psf(s, 0.1, train_index=np.arange(0, width, 4),
+                                                                     Maxiter=20)}
+
+    results = {}
+    for name, function in cases.items():
+        results[name] = measure(function, args.repeat)
+        print('%-30s %10.4f s' % (name, results[name]['median']))
+
+    with dataset(s_full) as file_name:
+        results['load_data'] = measure(lambda: processing.load_data(file_name, decimation_factor, data_only=True),
+                                       args.repeat)
+    print('%-30s %10.4f s' % ('load_data', results['load_data']['median']))
+
+    # accuracy against the ground truth scatterers
+    x_est = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight)
+    results['make_sparse_representation']['relative_error'] = float(synthetic.relative_error(x_est, x))
+    print('%-30s %10.4f' % ('relative error', results['make_sparse_representation']['relative_error']))
+
+    commit = git_commit()
+    record = {'commit': commit,
+              'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+              'python': sys.version.split()[0],
+              'numpy': np.__version__,
+              'platform': platform.platform(),
+              'cpu_count': os.cpu_count(),
+              'results': results}
+
+    output = Path(args.output or '../benchmarks/%s.json' % commit)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(record, f, indent=2)
+        f.close()
+    print('results written to %s' % output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+            f.close()
+
+        rows, regressions = compare(results, baseline['results'], args.threshold)
+        print('\ncompared with %s (%s)' % (args.compare, baseline['commit']))
+        for name, new, old, ratio, flag in rows:
+            if ratio is None:
+                print('%-30s %10.4f s %s' % (name, new, flag))
+            else:
+                print('%-30s %10.4f s %10.4f s %6.2fx %s' % (name, new, old, ratio, flag))
+
+        if regressions:
+            print('%d regression(s): %s' % (len(regressions), ', '.join(regressions)))
+            sys.exit(1)
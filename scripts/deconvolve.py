@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-20 9:40 a.m.
+# @Author  : young wang
+# @FileName: deconvolve.py
+# @Software: PyCharm
+
+"""batch sparse deconvolution of OCT datasets from the command line
+
+input files may be pickled A-line datasets [lines x depth] as in
+../data, .npy A-lines, .npz raw interferograms (key arr_1) or Ossiview
+.bin recordings. A-lines are mean removed, decimated and cut into
+frames of --width lines, each frame is deconvolved with
+make_sparse_representation in --workers processes (frames and results
+are passed through shared memory, see misc.shm), e.g.
+
+python deconvolve.py ../data/ear --psf ../data/PSF/ear --lmbda 0.05 --ear --format pgm -o ../output/ear
+"""
+
+import argparse
+import pickle
+import sys
+import time
+from contextlib import nullcontext
+import numpy as np
+from pathlib import Path
+from numpy.fft import ifft
+from misc import processing, export, shm
+
+
+def raw_to_Alines(raw):
+    '''Hann windowed IFFT of raw interferograms [lines x samples],
+    cropped to the A-line bins as in processing.Aline_H
+    '''
+    window = np.hanning(raw.shape[1])
+    return ifft(raw * window, axis=1)[:, -350:-20]
+
+
+def load_Alines(file_path, buffer='DAQ Buffer'):
+    '''A-lines [lines x depth] of an input file'''
+    path = Path(file_path)
+    if not path.is_file():
+        raise Exception("Dataset %s not found" % file_path)
+
+    if path.suffix == '.npy':
+        return np.load(path, mmap_mode='r')
+    elif path.suffix == '.npz':
+        return raw_to_Alines(processing.load_raw(str(path)))
+    elif path.suffix == '.bin':
+        from OssiviewBufferReader import OssiviewBufferReader
+        data = OssiviewBufferReader(str(path)).data[buffer]
+        data = np.reshape(data, (-1, data.shape[-1]))
+        return data if np.iscomplexobj(data) else raw_to_Alines(data)
+    else:
+        with open(path, 'rb') as f:
+            s = pickle.load(f)
+            f.close()
+        return s
+
+
+def load_psf(file_path):
+    if not Path(file_path).is_file():
+        raise Exception("PSF %s not found" % file_path)
+    with open(file_path, 'rb') as f:
+        D = pickle.load(f)
+        f.close()
+    return D
+
+
+def frames(A_lines, decimation_factor, width):
+    '''mean removed frames [depth x width] of every decimation_factor-th
+    A-line, as processing.load_data. Lines left over after the last full
+    frame are dropped, unless there is less than one frame
+    '''
+    s = processing.mean_remove(np.asarray(A_lines).T, decimation_factor)
+    n_frames = max(s.shape[1] // width, 1)
+    return [s[:, i * width:(i + 1) * width] for i in range(n_frames)]
+
+
+def _deconvolve(args):
+    '''one frame, executed in a worker process'''
+    s, D, lmbda, w_lmbda, speckle_weight, Ear, tile_width = args
+    if tile_width:
+        return processing.make_tiled_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight,
+                                                           tile_width=tile_width, Ear=Ear)
+    return processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Ear=Ear)
+
+
+def write(output, x, fmt, vmin, vmax, fps):
+    '''write the deconvolved frames [n_frames x depth x width]'''
+    output = Path(output)
+    if fmt == 'npy':
+        np.save(output.with_suffix('.npy'), x)
+    elif fmt == 'npz':
+        np.savez_compressed(output.with_suffix('.npz'), x=x)
+    elif fmt == 'pgm':
+        export.write_sequence(output, export.frames(x, vmin, vmax), prefix=output.name)
+    elif fmt == 'mp4':
+        export.write_video(output.with_suffix('.mp4'), x, fps=fps, vmin=vmin, vmax=vmax)
+
+
+def parse_range(text):
+    '''frame range "start:stop" (python slice semantics)'''
+    start, _, stop = text.partition(':')
+    return slice(int(start) if start else None, int(stop) if stop else None)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('inputs', nargs='+', help='pickle, .npy, .npz (raw) or Ossiview .bin files')
+    parser.add_argument('--psf', required=True, help='pickled PSF [depth x 1], e.g. ../data/PSF/ear')
+    parser.add_argument('--lmbda', type=float, default=0.05, help='sparsity regularization parameter')
+    parser.add_argument('--w-lmbda', type=float, default=0.05, help='regularization of the mask pass')
+    parser.add_argument('--speckle-weight', type=float, default=0.1, help='L1 weight in speckle regions')
+    parser.add_argument('--ear', action='store_true', help='smaller mask median filter, as for the ear data')
+    parser.add_argument('--decimation', type=int, default=20, help='use every n-th A-line')
+    parser.add_argument('--width', type=int, default=512, help='A-lines per frame')
+    parser.add_argument('--frames', type=parse_range, default=slice(None), help='frame range start:stop')
+    parser.add_argument('--tile-width', type=int, default=0, help='solve frames in lateral tiles of this width')
+    parser.add_argument('--buffer', default='DAQ Buffer', help='buffer of Ossiview recordings')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes')
+    parser.add_argument('--format', choices=['npy', 'npz', 'pgm', 'mp4'], default='npy')
+    parser.add_argument('--range', type=float, nargs=2, default=(5, 55), metavar=('VMIN', 'VMAX'),
+                        help='display range in dB of pgm and mp4 output')
+    parser.add_argument('--fps', type=float, default=25, help='frame rate of mp4 output')
+    parser.add_argument('-o', '--output', default=None,
+                        help='output path without extension (one input only), default <input>_sparse')
+    args = parser.parse_args()
+
+    assert args.output is None or len(args.inputs) == 1, '--output names the output of a single input'
+    np.seterr(divide='ignore')
+    D = load_psf(args.psf)
+
+    for file_path in args.inputs:
+        t0 = time.perf_counter()
+        s = frames(load_Alines(file_path, args.buffer), args.decimation, args.width)
+        if not s[args.frames]:
+            parser.error('--frames selects none of the %d frames of %s' % (len(s), file_path))
+        s = s[args.frames]
+        tasks = [(s_i, D, args.lmbda, args.w_lmbda, args.speckle_weight, args.ear, args.tile_width) for s_i in s]
+        print('%s: %d frames of %d x %d' % (file_path, len(s), s[0].shape[0], s[0].shape[1]), file=sys.stderr)
+
+        if args.workers > 1:
+            pipeline = shm.FramePipeline(D, args.lmbda, args.w_lmbda, args.speckle_weight, s[0].shape,
+                                         processes=args.workers, Ear=args.ear, tile_width=args.tile_width)
+            results = pipeline.map(s)
+        else:
+            pipeline = nullcontext()
+            results = map(_deconvolve, tasks)
+
+        # the pipeline's pool and shared memory are released however the loop ends
+        with pipeline:
+            x, n_lines = [], 0
+            t = time.perf_counter()
+            for i, x_i in enumerate(results):
+                x.append(x_i)
+                n_lines += x_i.shape[1]
+                elapsed = time.perf_counter() - t
+                print('\r  frame %d/%d  %.1f frames/s  %.0f A-lines/s' % (i + 1, len(s), (i + 1) / elapsed,
+                                                                           n_lines / elapsed),
+                      end='', file=sys.stderr)
+            print(file=sys.stderr)
+
+        x = np.stack(x)
+        output = args.output or str(Path(file_path).with_suffix('')) + '_sparse'
+        write(output, x, args.format, *args.range, args.fps)
+        print('  written %s (%s), total %.1f s' % (output, args.format, time.perf_counter() - t0), file=sys.stderr)
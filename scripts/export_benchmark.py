@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 7:40 p.m.
+# @Author  : young wang
+# @FileName: export_benchmark.py
+# @Software: PyCharm
+
+"""this script benchmarks the export of a stack of deconvolved B-scans
+in frames per second: 8-bit conversion alone, a PGM frame sequence,
+an ffmpeg raw video pipe (if ffmpeg is installed) and, for reference,
+one matplotlib savefig per frame as the figure scripts do"""
+
+import numpy as np
+import tempfile
+import time
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+from pathlib import Path
+from tabulate import tabulate
+from misc import export
+
+# Module level constants
+n_frames, depth, width = 64, 330, 512
+
+
+def fps(function, n):
+    t = time.perf_counter()
+    function()
+    return n / (time.perf_counter() - t)
+
+
+def savefig_frames(volume, folder, dpi):
+    for i, x in enumerate(volume):
+        fig, ax = plt.subplots(1, 1, figsize=(5, 4))
+        ax.imshow(20 * np.log10(abs(x)), 'gray', aspect=x.shape[1] / x.shape[0],
+                  vmax=export.vmax, vmin=export.rvmin)
+        ax.set_axis_off()
+        fig.savefig(Path(folder) / ('frame_%05d.jpeg' % i), dpi=dpi, transparent=True, format='jpeg')
+        plt.close(fig)
+
+
+if __name__ == '__main__':
+
+    rng = np.random.default_rng(0)
+    volume = (rng.standard_normal((n_frames, depth, width)) +
+              1j * rng.standard_normal((n_frames, depth, width))) * 10 ** rng.uniform(0, 3, (1, depth, width))
+
+    out = np.empty(volume.shape, dtype=np.uint8)
+    table = [['8-bit conversion', fps(lambda: export.to_frames(volume, out=out), n_frames)]]
+
+    with tempfile.TemporaryDirectory() as folder:
+        table.append(['PGM sequence',
+                      fps(lambda: export.write_sequence(folder, export.frames(volume)), n_frames)])
+
+        try:
+            table.append(['ffmpeg libx264',
+                          fps(lambda: export.write_video(Path(folder) / 'volume.mp4', volume), n_frames)])
+        except Exception as e:
+            print('ffmpeg video skipped: %s' % e)
+
+        n = 4
+        table.append(['matplotlib savefig (dpi 800)', fps(lambda: savefig_frames(volume[:n], folder, 800), n)])
+
+    print(tabulate(table, headers=['export', 'frames/s'],
+                   tablefmt='fancy_grid', floatfmt='.1f', numalign='right'))
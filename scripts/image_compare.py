@@ -16,26 +16,43 @@ from matplotlib import pyplot as plt
 from sporco.admm import cbpdn
 from misc import processing
 from scipy.ndimage import median_filter
-import polarTransform
 
 # Module level constants
 eps = 1e-14
+rc_params = {'font.size': 15, 'text.usetex': False, 'font.family': 'sans-serif', 'mathtext.fontset': 'stix'}
+file_name = ['ear', 'finger', 'nail', 'onion']
+title_name = [r'(a) middle ear', r'(b) index finger (palmar view)', r'(c) index finger (side view)', r'(d) onion slice']
+
+
+def plot(original, sparse, lmbda, speckle_weight, rvmin, vmax):
+    '''the figure of the log images (original) above their sparse
+    estimates (sparse), one column per dataset of file_name'''
+    aspect = original[0].shape[1]/original[0].shape[0]
+    fig, ax = plt.subplots(nrows=2, ncols=4, sharey=True, sharex=True, figsize=(16, 9),constrained_layout=True )
+
+    for i in range(len(file_name)):
+        title = '\n'.join((title_name[i],r'$𝜆$ = %.2f,$W$ = %.1f' % (lmbda[i], speckle_weight)))
+
+        ax[0, i].set_title(title,fontsize=20)
+        ax[0, i].imshow(original[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
+
+        #ax[0, i].annotate('', xy=(x_head[i], y_head[i]), xycoords='data',
+        #                  xytext=(x_end[i], y_end[i]), textcoords='data',
+        #                  arrowprops=dict(facecolor='white', shrink=0.05),
+        #                  horizontalalignment='right', verticalalignment='top',
+        #                  )
+
+        ax[1, i].imshow(sparse[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
+        ax[0, i].set_axis_off()
+        ax[1, i].set_axis_off()
+    return fig
+
 
 if __name__ == '__main__':
 
     plt.close('all')
     # Customize matplotlib params
-    matplotlib.rcParams.update(
-        {
-            'font.size': 15,
-            'text.usetex': False,
-            'font.family': 'sans-serif',
-            'mathtext.fontset': 'stix',
-        }
-    )
-
-    file_name = ['ear', 'finger', 'nail', 'onion']
-    title_name = [r'(a) middle ear', r'(b) index finger (palmar view)', r'(c) index finger (side view)', r'(d) onion slice']
+    matplotlib.rcParams.update(rc_params)
 
     original = []
     sparse = []
@@ -74,28 +91,9 @@ if __name__ == '__main__':
     x_end = [350, 150, 190, 190]
     y_end = [90, 105, 150, 100]
 
-    aspect = original[0].shape[1]/original[0].shape[0]
-    fig, ax = plt.subplots(nrows=2, ncols=4, sharey=True, sharex=True, figsize=(16, 9),constrained_layout=True )
-
     cartesianImage=x_log
-    
-    for i in range(len(file_name)):
-        title = '\n'.join((title_name[i],r'$𝜆$ = %.2f,$W$ = %.1f' % (lmbda[i], speckle_weight)))
-
-        ax[0, i].set_title(title,fontsize=20)
-        ax[0, i].imshow(original[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
-        
-        
-        #ax[0, i].annotate('', xy=(x_head[i], y_head[i]), xycoords='data',
-        #                  xytext=(x_end[i], y_end[i]), textcoords='data',
-        #                  arrowprops=dict(facecolor='white', shrink=0.05),
-        #                  horizontalalignment='right', verticalalignment='top',
-        #                  )
-
-        ax[1, i].imshow(sparse[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
-        ax[0, i].set_axis_off()
-        ax[1, i].set_axis_off()
 
+    fig = plot(original, sparse, lmbda, speckle_weight, rvmin, vmax)
     plt.show()
 
     fig.savefig('../Images/image_compare.jpeg',
@@ -104,6 +102,7 @@ if __name__ == '__main__':
 
     
     # from numpy import pi
+    # import polarTransform
     # #plt.close('all')
     # ear_image=sparse[0]
     # ear_image[0,:]=vmax
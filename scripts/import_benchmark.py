@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-20 10:45 a.m.
+# @Author  : young wang
+# @FileName: import_benchmark.py
+# @Software: PyCharm
+
+"""this script measures the import time of the misc modules, each in a
+fresh interpreter, and lists which heavy dependencies (sporco, skimage,
+scipy.signal, scipy.ndimage, matplotlib) an import pulls in"""
+
+import subprocess
+import sys
+import numpy as np
+from tabulate import tabulate
+
+# Module level constants
+repeat = 5
+modules = ['numpy', 'misc.processing', 'misc.quality', 'misc.profiling', 'misc.synthetic',
+           'misc.streaming', 'misc.export', 'misc.prefetch', 'misc.shm',
+           'misc.psf', 'misc.psf_bank', 'misc.learning']
+heavy = ['sporco', 'skimage', 'scipy.signal', 'scipy.ndimage', 'matplotlib']
+
+# run in the child interpreter: import time in ms, then the heavy modules loaded
+probe = '''
+import sys, time
+t = time.perf_counter()
+import %s
+print(1e3 * (time.perf_counter() - t))
+print(' '.join(m for m in %r if m in sys.modules))
+'''
+
+if __name__ == '__main__':
+
+    table = []
+    for module in modules:
+        times = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-c', probe % (module, heavy)], capture_output=True,
+                                 text=True, check=True).stdout.split('\n')
+            times.append(float(out[0]))
+        table.append([module, np.median(times), out[1]])
+
+    print(tabulate(table, headers=['module', 'import [ms]', 'heavy dependencies loaded'],
+                   tablefmt='fancy_grid', floatfmt='.1f', numalign='right'))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 4:50 p.m.
+# @Author  : young wang
+# @FileName: kernel_benchmark.py
+# @Software: PyCharm
+
+"""this script micro-benchmarks the batched FFT kernels of
+misc/kernels.py against the sporco path used in make_sparse_representation
+and sparse_recon: the forward convolution D * x and the full 200
+iteration weighted CBPDN solve, on a [330 x 512] frame"""
+
+import numpy as np
+import pickle
+import timeit
+from tabulate import tabulate
+from sporco.admm import cbpdn
+from misc import processing, kernels, synthetic
+
+# Module level constants
+lmbda = 0.05
+depth, width = 330, 512
+
+
+def best_of(stmt, number, repeat=5):
+    '''best time per call in ms'''
+    return 1e3 * min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+if __name__ == '__main__':
+
+    with open('../data/PSF/ear', 'rb') as f:
+        D = pickle.load(f)
+        f.close()
+
+    s, _ = synthetic.frame(D, width=width, seed=0)
+    _, snorm = processing.to_l2_normed(s)
+
+    # a two level L1 weight, as produced by getWeight
+    W = np.ones(s.shape)
+    W[100:200, 100:400] = 0.1
+
+    opt = {'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+           'MaxMainIter': 200, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+           'RelaxParam': 1.515, 'L1Weight': np.reshape(W, (depth, 1, width, 1)),
+           'AutoRho': {'Enabled': True}}
+
+    b = cbpdn.ConvBPDN(D, snorm, lmbda, opt=cbpdn.ConvBPDN.Options(opt), dimK=1, dimN=1)
+    x_ref = b.solve().squeeze()
+
+    # sporco path
+    conv_table = [['sporco reconstruct', 'complex128', best_of(lambda: b.reconstruct(), 50)]]
+    solve_table = [['sporco ConvBPDN', 'complex128', b.k,
+                    best_of(lambda: cbpdn.ConvBPDN(D, snorm, lmbda, opt=cbpdn.ConvBPDN.Options(opt),
+                                                   dimK=1, dimN=1).solve(), 1, 3), 0.0]]
+
+    backends = [('scipy.fft', False)]
+    if kernels.pyfftw is not None:
+        backends.insert(0, ('fftw', True))
+
+    for backend, use_fftw in backends:
+        for dtype in (np.complex128, np.complex64):
+            shape = (width, depth)
+            X = kernels.to_lines(x_ref, dtype)
+            conv = kernels.Conv1D(D, shape, dtype=dtype, use_fftw=use_fftw)
+            out = np.empty(shape, dtype=dtype)
+            conv_table.append(['Conv1D (%s)' % backend, np.dtype(dtype).name,
+                               best_of(lambda: conv.forward(X, out=out), 50)])
+
+            solver = kernels.ConvBPDN1D(D, shape, lmbda, dtype=dtype, use_fftw=use_fftw,
+                                        opt={'MaxMainIter': 200, 'RelStopTol': 5e-5, 'RelaxParam': 1.515,
+                                             'L1Weight': kernels.to_lines(W, np.float64).real})
+            S = kernels.to_lines(snorm, dtype)
+            x = kernels.from_lines(solver.solve(S))
+            error = np.linalg.norm(x - x_ref) / np.linalg.norm(x_ref)
+            solve_table.append(['ConvBPDN1D (%s)' % backend, np.dtype(dtype).name, solver.k,
+                                best_of(lambda: solver.solve(S), 1, 3), error])
+
+    print(tabulate(conv_table, headers=['forward convolution', 'dtype', 'time [ms]'],
+                   tablefmt='fancy_grid', floatfmt='.3f', numalign='right'))
+    print(tabulate(solve_table, headers=['weighted CBPDN', 'dtype', 'iterations', 'time [ms]', 'relative error'],
+                   tablefmt='fancy_grid', floatfmt=('', '', '', '.1f', '.1e'), numalign='right'))
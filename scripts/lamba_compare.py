@@ -17,6 +17,7 @@ from sporco.admm import cbpdn
 
 # Module level constants
 eps = 1e-14
+rc_params = {'font.size': 16, 'text.usetex': False, 'font.family': 'sans-serif', 'mathtext.fontset': 'stix'}
 
 def sparse_recon(s, D, lmbda,rvmin, vmax):
     l2f, s_norm = processing.to_l2_normed(s)
@@ -38,52 +39,11 @@ def sparse_recon(s, D, lmbda,rvmin, vmax):
 
 np.seterr(divide = 'ignore')
 
-if __name__ == '__main__':
-
-    plt.close('all')
-    # Customize matplotlib params
-    matplotlib.rcParams.update(
-        {
-            'font.size': 16,
-            'text.usetex': False,
-            'font.family': 'sans-serif',
-            'mathtext.fontset': 'stix',
-        }
-    )
-    file_name = ['ear']
-    # Load the example dataset
-    s, D = processing.load_data(file_name[0], decimation_factor=20)
-    rvmin, vmax = 5, 55  # dB
-
-    s_log = 20 * np.log10(abs(s))
-
-    # l2 norm data and save the scaling factor
-    _, snorm = processing.to_l2_normed(s)
-
-    speckle_weight = 0.1
-
-    lmbda = [1e-5, 0.01, 0.05, 0.10, 0.15, 0.4]
-
-    w_lmbda = 0.05
-
-    index = 400  # index A-line
-    s_line = abs(snorm[:, index])
-
-    x_line = np.zeros((snorm.shape[0], len(lmbda)))
-    sparse = np.zeros((snorm.shape[0], snorm.shape[1], len(lmbda)))
-    r0_log = np.zeros((snorm.shape[0], snorm.shape[1], len(lmbda)))
-
-    for i in range(len(lmbda)):
-        x, line = processing.make_sparse_representation(s, D, lmbda[i],
-                                                        w_lmbda, speckle_weight, Line=True, index=index,
-                                                        Ear=True)
-        x_log = 20 * np.log10(abs(x))
-
-        r0_log[:, :, i] = sparse_recon(s, D, lmbda[i], rvmin,vmax)
-        sparse[:, :, i] = processing.display_range(x_log, rvmin,vmax)
-
-        x_line[:, i] = line
-
+def plot(s_log, r0_log, sparse, s_line, x_line, lmbda, speckle_weight, index, rvmin, vmax):
+    '''the figure of the reference (s_log) and, per value of lmbda,
+    the sparse estimate image (r0_log[:, :, i]), the sparse vector
+    image (sparse[:, :, i]), its homogeneous region and its A-line
+    index (x_line[:, i])'''
     width, height = (115, 95)
     homogeneous = [[125, 120, width, height]]
 
@@ -214,6 +174,49 @@ if __name__ == '__main__':
         ax.set_ylim(0, np.max(s_line) * 1.1)
 
         ax.set_xlabel('axial depth [pixels]', fontsize = 14)
+    return fig
+
+
+if __name__ == '__main__':
+
+    plt.close('all')
+    # Customize matplotlib params
+    matplotlib.rcParams.update(rc_params)
+    file_name = ['ear']
+    # Load the example dataset
+    s, D = processing.load_data(file_name[0], decimation_factor=20)
+    rvmin, vmax = 5, 55  # dB
+
+    s_log = 20 * np.log10(abs(s))
+
+    # l2 norm data and save the scaling factor
+    _, snorm = processing.to_l2_normed(s)
+
+    speckle_weight = 0.1
+
+    lmbda = [1e-5, 0.01, 0.05, 0.10, 0.15, 0.4]
+
+    w_lmbda = 0.05
+
+    index = 400  # index A-line
+    s_line = abs(snorm[:, index])
+
+    x_line = np.zeros((snorm.shape[0], len(lmbda)))
+    sparse = np.zeros((snorm.shape[0], snorm.shape[1], len(lmbda)))
+    r0_log = np.zeros((snorm.shape[0], snorm.shape[1], len(lmbda)))
+
+    for i in range(len(lmbda)):
+        x, line = processing.make_sparse_representation(s, D, lmbda[i],
+                                                        w_lmbda, speckle_weight, Line=True, index=index,
+                                                        Ear=True)
+        x_log = 20 * np.log10(abs(x))
+
+        r0_log[:, :, i] = sparse_recon(s, D, lmbda[i], rvmin,vmax)
+        sparse[:, :, i] = processing.display_range(x_log, rvmin,vmax)
+
+        x_line[:, i] = line
+
+    fig = plot(s_log, r0_log, sparse, s_line, x_line, lmbda, speckle_weight, index, rvmin, vmax)
     plt.show()
 
     fig.savefig('../Images/lambda_compare.jpeg',
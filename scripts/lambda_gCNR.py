@@ -14,7 +14,6 @@ import matplotlib
 from matplotlib import pyplot as plt
 from misc import processing, quality, annotation
 import matplotlib.gridspec as gridspec
-from scipy.ndimage import median_filter
 
 from tabulate import tabulate
 from matplotlib.ticker import (MultipleLocator)
@@ -91,11 +90,11 @@ def anote(ax, s, median_flag=False):
     if median_flag == True:
 
         textstr = '\n'.join((
-            '${gCNR_{{H_1}/{A}}}$: %.2f' % (quality.log_gCNR(h1, ar, improvement=True)),
-            '${gCNR_{{H_2}/{A}}}$: %.2f' % (quality.log_gCNR(h2, ar, improvement=True)),
-            '${gCNR_{{H_1}/B}}$: %.2f' % (quality.log_gCNR(h1, ba, improvement=True)),
-            '${gCNR_{{H_2}/B}}$: %.2f' % (quality.log_gCNR(h2, ba, improvement=True)),
-            '${gCNR_{{H_1}/{H_2}}}$: %.2f' % (quality.log_gCNR(h1, h2, improvement=True))))
+            '${gCNR_{{H_1}/{A}}}$: %.2f' % (quality.median_gCNR(s, roi['homogeneous'][0], roi['artifact'][0])),
+            '${gCNR_{{H_2}/{A}}}$: %.2f' % (quality.median_gCNR(s, roi['homogeneous'][1], roi['artifact'][0])),
+            '${gCNR_{{H_1}/B}}$: %.2f' % (quality.median_gCNR(s, roi['homogeneous'][0], roi['background'][0])),
+            '${gCNR_{{H_2}/B}}$: %.2f' % (quality.median_gCNR(s, roi['homogeneous'][1], roi['background'][0])),
+            '${gCNR_{{H_1}/{H_2}}}$: %.2f' % (quality.median_gCNR(s, roi['homogeneous'][0], roi['homogeneous'][1]))))
         ax.text(0.60, 0.98, textstr, transform=ax.transAxes, fontsize=legend_font,
                 weight='bold', verticalalignment='top', fontname='Arial', color='white')
 
@@ -322,7 +321,8 @@ if __name__ == '__main__':
              label1=r'${H_1}$', label2=r'${H_2}$',clr1 = 'red', clr2 = 'orange',
              yLimFlag=True)
 
-    b_log = median_filter(x_log, size=(3, 3))
+    # the median commutes with the log, so reuse the cached filter pass
+    b_log = 10 * np.log10(quality.median_image(x_intensity))
     ax = fig.add_subplot(gs[0, 2])
 
     textstr = '\n'.join((
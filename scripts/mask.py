@@ -13,6 +13,9 @@ from misc import processing
 
 # Module level constants
 eps = 1e-14
+rc_params = {'font.size': 18, 'text.usetex': False, 'font.family': 'stixgeneral', 'mathtext.fontset': 'stix'}
+file_name = ['ear', 'finger', 'nail', 'onion']
+title_name = ['middle ear', 'index finger (palmar view)', 'index finger (side view)', 'onion slice']
 
 
 def plot_images(plot_titles, image,
@@ -76,22 +79,31 @@ def plot_images(plot_titles, image,
     plt.show()
 
 
+def plot(original, sparse, W, lmbda, speckle_weight, rvmin, vmax):
+    '''the figure of the log images (original) with the contour of
+    their weighting masks (W) above their sparse estimates (sparse), one
+    column per dataset of file_name'''
+    aspect = original[0].shape[1]/original[0].shape[0]
+    fig, ax = plt.subplots(nrows=2, ncols=4, sharey=True, sharex=True, figsize=(16, 9),constrained_layout=True )
+
+    for i in range(len(file_name)):
+        title = '\n'.join((title_name[i],'𝜆 = %.2f $\omega$ = %.1f' % (lmbda, speckle_weight)))
+
+        ax[0, i].set_title(title,fontsize=20)
+        ax[0, i].imshow(original[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
+        ax[0, i].contour(W[i], [0.99], colors='orange', alpha=0.75, linestyles='dashed')
+
+        ax[1, i].imshow(sparse[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
+        ax[0, i].set_axis_off()
+        ax[1, i].set_axis_off()
+    return fig
+
 
 if __name__ == '__main__':
 
     plt.close('all')
     # Customize matplotlib params
-    matplotlib.rcParams.update(
-        {
-            'font.size': 18,
-            'text.usetex': False,
-            'font.family': 'stixgeneral',
-            'mathtext.fontset': 'stix',
-        }
-    )
-
-    file_name = ['ear', 'finger', 'nail', 'onion']
-    title_name = ['middle ear', 'index finger (palmar view)', 'index finger (side view)', 'onion slice']
+    matplotlib.rcParams.update(rc_params)
 
     original = []
     sparse = []
@@ -129,20 +141,7 @@ if __name__ == '__main__':
         sparse.append(x_log)
         W.append(mask)
 
-    aspect = original[0].shape[1]/original[0].shape[0]
-    fig, ax = plt.subplots(nrows=2, ncols=4, sharey=True, sharex=True, figsize=(16, 9),constrained_layout=True )
-
-    for i in range(len(file_name)):
-        title = '\n'.join((title_name[i],'𝜆 = %.2f $\omega$ = %.1f' % (lmbda, speckle_weight)))
-
-        ax[0, i].set_title(title,fontsize=20)
-        ax[0, i].imshow(original[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
-        ax[0, i].contour(W[i], [0.99], colors='orange', alpha=0.75, linestyles='dashed')
-
-        ax[1, i].imshow(sparse[i], 'gray',aspect=aspect,vmax=vmax, vmin=rvmin,interpolation='none')
-        ax[0, i].set_axis_off()
-        ax[1, i].set_axis_off()
-
+    fig = plot(original, sparse, W, lmbda, speckle_weight, rvmin, vmax)
     plt.show()
 
     fig.savefig('../Images/mask.svg',
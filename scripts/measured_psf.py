@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 11:05 a.m.
+# @Author  : young wang
+# @FileName: measured_psf.py
+# @Software: PyCharm
+
+"""this script extracts the measured PSF from the mirror recording
+and writes it in the same [330 x 1] complex layout as data/PSF/measured.
+The mirror volume is streamed from a memory map instead of being loaded"""
+
+import pickle
+import time
+from misc import psf
+
+if __name__ == '__main__':
+
+    S_PATH = '../data/mirror_clean.npy'
+    D_PATH = '../data/PSF/mirror'
+
+    t = time.perf_counter()
+    sg = psf.mirror_mean(S_PATH, chunk_size=64)
+    D = psf.measured_psf(sg, numtaps=401, cutoff=0.05, half_width=165)
+    print('PSF extraction time: %.2f s' % (time.perf_counter() - t))
+
+    stats = psf.locate_peaks(D, 20, 100, height='median')[0]
+    print('PSF - sidelobe: %.2f dB' % stats['sidelobe_level'])
+    print('PSF - background: %.2f dB' % stats['dynamic_range'])
+
+    with open(D_PATH, 'wb') as f:
+        pickle.dump(D, f)
+        f.close()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 7:10 p.m.
+# @Author  : young wang
+# @FileName: export.py
+# @Software: PyCharm
+
+import numpy as np
+import shutil
+import subprocess
+from pathlib import Path
+from misc import processing
+
+# Module level constants
+rvmin, vmax = 5, 55  # dB
+
+
+def to_frames(volume, vmin=rvmin, vmax=vmax, out=None):
+    '''8-bit display frames [n_frames x depth x width] of a stack of
+    deconvolved B-scans, 20 log10 |x| clipped to [vmin, vmax] dB
+    '''
+    volume = np.asarray(volume)
+    if out is None:
+        out = np.empty(volume.shape, dtype=np.uint8)
+    for i in range(volume.shape[0]):
+        processing.log_uint8(volume[i], vmin, vmax, out=out[i])
+    return out
+
+
+def frames(volume, vmin=rvmin, vmax=vmax):
+    '''generator of 8-bit display frames, one B-scan at a time, reusing
+    a single frame buffer
+    '''
+    out = None
+    for x in volume:
+        if out is None:
+            out = np.empty(np.shape(x), dtype=np.uint8)
+        yield processing.log_uint8(x, vmin, vmax, out=out)
+
+
+def write_pgm(file_path, frame):
+    '''write one uint8 frame as a binary PGM (P5) image'''
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    with open(file_path, 'wb') as f:
+        f.write(b'P5\n%d %d\n255\n' % (frame.shape[1], frame.shape[0]))
+        f.write(frame.tobytes())
+        f.close()
+
+
+def write_sequence(folder, frame_iter, prefix='frame'):
+    '''write frames as folder/prefix_00000.pgm, ..., returns the count'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    n = 0
+    for frame in frame_iter:
+        write_pgm(folder / ('%s_%05d.pgm' % (prefix, n)), frame)
+        n += 1
+    return n
+
+
+class VideoWriter:
+    '''pipe uint8 grayscale frames to ffmpeg as raw video
+
+    parameters
+    ----------
+    file_path: output video, e.g. ../video/visualization.mp4
+    shape: frame shape [height x width]
+    fps: frame rate
+    codec: ffmpeg video codec
+    crf: constant rate factor of the codec, lower is higher quality
+    '''
+
+    def __init__(self, file_path, shape, fps=25, codec='libx264', crf=18):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise Exception("ffmpeg not found")
+
+        self.shape = tuple(shape)
+        height, width = self.shape
+        # yuv420p needs even dimensions, pad the bottom and right edge
+        command = [ffmpeg, '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'gray', '-s', '%dx%d' % (width, height),
+                   '-r', str(fps), '-i', '-',
+                   '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                   '-c:v', codec, '-crf', str(crf), '-pix_fmt', 'yuv420p', str(file_path)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.n_frames = 0
+
+    def write(self, frame):
+        assert frame.shape == self.shape and frame.dtype == np.uint8, 'frames must be uint8 of the video shape'
+        self.process.stdin.write(np.ascontiguousarray(frame).data)
+        self.n_frames += 1
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise Exception("ffmpeg exited with code %d" % self.process.returncode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_video(file_path, volume, fps=25, vmin=rvmin, vmax=vmax, **kwargs):
+    '''convert a stack of B-scans to 8-bit and encode it as a video,
+    returns the number of frames written
+    '''
+    with VideoWriter(file_path, np.shape(volume[0]), fps=fps, **kwargs) as writer:
+        for frame in frames(volume, vmin, vmax):
+            writer.write(frame)
+    return writer.n_frames
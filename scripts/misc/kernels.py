@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 4:20 p.m.
+# @Author  : young wang
+# @FileName: kernels.py
+# @Software: PyCharm
+
+import numpy as np
+import scipy.fft
+
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+
+def to_lines(s, dtype=np.complex64):
+    '''copy a frame [depth x lines] into a contiguous [lines x depth]
+    block, so that every FFT runs over contiguous memory
+    '''
+    return np.ascontiguousarray(np.asarray(s).T, dtype=dtype)
+
+
+def from_lines(x):
+    '''[lines x depth] block back to the [depth x lines] frame layout'''
+    return x.T
+
+
+class FFTPlan:
+    '''forward/inverse FFT along the last axis between two fixed buffers
+
+    with pyfftw installed the transforms are FFTW plans on the buffers
+    themselves (no allocation per call), otherwise scipy.fft is used
+    with workers threads
+
+    parameters
+    ----------
+    shape: [lines x depth] block shape
+    dtype: complex64 or complex128
+    workers: number of FFT threads, -1 for all cores
+    '''
+
+    def __init__(self, shape, dtype=np.complex64, workers=-1, use_fftw=True):
+        self.workers = workers
+        if workers == -1:
+            import os
+            workers = os.cpu_count()
+
+        if use_fftw and pyfftw is not None:
+            self.a = pyfftw.empty_aligned(shape, dtype=dtype)
+            self.A = pyfftw.empty_aligned(shape, dtype=dtype)
+            self._fft = pyfftw.FFTW(self.a, self.A, axes=(-1,), direction='FFTW_FORWARD',
+                                    flags=('FFTW_MEASURE',), threads=workers)
+            self._ifft = pyfftw.FFTW(self.A, self.a, axes=(-1,), direction='FFTW_BACKWARD',
+                                     flags=('FFTW_MEASURE',), threads=workers)
+            self.fftw = True
+        else:
+            self.a = np.empty(shape, dtype=dtype)
+            self.A = np.empty(shape, dtype=dtype)
+            self.fftw = False
+
+    def fft(self):
+        '''self.A = FFT(self.a)'''
+        if self.fftw:
+            self._fft()
+        else:
+            self.A[:] = scipy.fft.fft(self.a, axis=-1, workers=self.workers)
+        return self.A
+
+    def ifft(self):
+        '''self.a = IFFT(self.A)'''
+        if self.fftw:
+            self._ifft()
+        else:
+            self.a[:] = scipy.fft.ifft(self.A, axis=-1, workers=self.workers)
+        return self.a
+
+
+class Conv1D:
+    '''circular convolution of every A-line of a [lines x depth] block
+    with a single PSF, as in the sporco model s = D * x along depth
+
+    parameters
+    ----------
+    D: PSF [taps x 1] or [taps], taps <= depth
+    shape: [lines x depth] block shape
+    '''
+
+    def __init__(self, D, shape, dtype=np.complex64, workers=-1, use_fftw=True):
+        self.shape = shape
+        self.dtype = dtype
+        self.plan = FFTPlan(shape, dtype, workers, use_fftw)
+        self.Df = scipy.fft.fft(np.ravel(D), n=shape[-1]).astype(dtype)
+        self.Df_conj = np.conj(self.Df)
+
+    def forward(self, x, out=None):
+        '''D * x'''
+        self.plan.a[:] = x
+        self.plan.fft()
+        self.plan.A *= self.Df
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        out[:] = self.plan.ifft()
+        return out
+
+    def adjoint(self, r, out=None):
+        '''D^H * r, correlation with the PSF'''
+        self.plan.a[:] = r
+        self.plan.fft()
+        self.plan.A *= self.Df_conj
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        out[:] = self.plan.ifft()
+        return out
+
+
+class ConvBPDN1D:
+    '''single-atom 1-D convolutional BPDN solved with ADMM on a
+    contiguous [lines x depth] block
+
+    argmin_x (1/2) ||D * x - s||_2^2 + lmbda ||W o x||_1
+
+    the iterations follow sporco.admm.cbpdn.ConvBPDN (relaxation,
+    normalised residuals and AutoRho residual balancing with the same
+    defaults), but all work arrays are allocated once and reused
+    across iterations and solves, in complex64 by default
+
+    parameters
+    ----------
+    D: PSF [taps x 1]
+    shape: [lines x depth] block shape
+    lmbda: sparsity regularization parameter
+    opt: dict with MaxMainIter, RelStopTol, AbsStopTol, RelaxParam,
+    rho, L1Weight ([lines x depth] or scalar) and AutoRho
+    (Enabled, Period, Scaling, RsdlRatio, RsdlTarget, AutoScaling)
+    '''
+
+    defaults = {'MaxMainIter': 1000, 'RelStopTol': 1e-3, 'AbsStopTol': 0.0,
+                'RelaxParam': 1.8, 'rho': None, 'L1Weight': 1.0,
+                'AutoRho': {'Enabled': True, 'Period': 1, 'Scaling': 1000.0,
+                            'RsdlRatio': 1.2, 'RsdlTarget': None, 'AutoScaling': True}}
+
+    def __init__(self, D, shape, lmbda, opt=None, dtype=np.complex64, workers=-1, use_fftw=True):
+        self.opt = dict(self.defaults)
+        self.opt['AutoRho'] = dict(self.defaults['AutoRho'])
+        if opt is not None:
+            for key, value in opt.items():
+                if key == 'AutoRho':
+                    self.opt['AutoRho'].update(value)
+                else:
+                    self.opt[key] = value
+
+        self.shape = shape
+        self.dtype = dtype
+        rdtype = np.float32 if dtype == np.complex64 else np.float64
+        self.lmbda = lmbda
+
+        self.conv = Conv1D(D, shape, dtype, workers, use_fftw)
+        self.plan = self.conv.plan
+        self.Df = self.conv.Df
+        self.DDf = (abs(self.Df) ** 2).astype(rdtype)
+
+        self.rho_xi = self.opt['AutoRho']['RsdlTarget']
+        if self.rho_xi is None:
+            self.rho_xi = float(1.0 + 18.3 ** (np.log10(lmbda) + 1.0)) if lmbda != 0 else 1.0
+
+        self.W = np.asarray(self.opt['L1Weight'], dtype=rdtype)
+        # lmbda / rho * W, the soft threshold, updated with rho
+        self.threshold = np.empty(self.W.shape, dtype=rdtype)
+
+        # work arrays, allocated once
+        self.X = np.empty(shape, dtype=dtype)
+        self.Y = np.empty(shape, dtype=dtype)
+        self.Yprev = np.empty(shape, dtype=dtype)
+        self.U = np.empty(shape, dtype=dtype)
+        self.AX = np.empty(shape, dtype=dtype)
+        self.DSf = np.empty(shape, dtype=dtype)
+        self.tmp = np.empty(shape, dtype=dtype)
+        self.mag = np.empty(shape, dtype=rdtype)
+        self.denom = np.empty(shape[-1], dtype=rdtype)
+
+    def set_rho(self, rho):
+        self.rho = rho
+        self.denom[:] = 1.0 / (self.DDf + rho)
+        np.multiply(self.W, self.lmbda / rho, out=self.threshold)
+
+    def prox_l1(self, v, alpha, out):
+        '''complex soft thresholding out = v * max(0, 1 - alpha / |v|)'''
+        np.abs(v, out=self.mag)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(alpha, self.mag, out=self.mag)
+        np.subtract(1, self.mag, out=self.mag)
+        np.maximum(self.mag, 0, out=self.mag)
+        np.multiply(v, self.mag, out=out)
+        return out
+
+    def solve(self, S):
+        '''solve for the [lines x depth] block S, returns Y (the sparse
+        auxiliary variable, as sporco's getmin with ReturnX False)
+        '''
+        opt = self.opt
+        autorho = opt['AutoRho']
+        alpha = opt['RelaxParam']
+        N = self.X.size
+
+        self.set_rho(opt['rho'] if opt['rho'] is not None else 50.0 * self.lmbda + 1.0)
+
+        # D^H S in the DFT domain
+        self.plan.a[:] = S
+        np.multiply(self.conv.Df_conj, self.plan.fft(), out=self.DSf)
+
+        self.Y[:] = 0
+        self.U[:] = 0
+
+        for self.k in range(opt['MaxMainIter']):
+            self.Y, self.Yprev = self.Yprev, self.Y
+
+            # X step: (|D|^2 + rho) Xf = D^H S + rho FFT(Y - U)
+            np.subtract(self.Yprev, self.U, out=self.plan.a)
+            A = self.plan.fft()
+            A *= self.rho
+            A += self.DSf
+            A *= self.denom
+            self.X[:] = self.plan.ifft()
+
+            # relaxation
+            if alpha == 1.0:
+                self.AX[:] = self.X
+            else:
+                np.multiply(self.X, alpha, out=self.AX)
+                np.multiply(self.Yprev, 1 - alpha, out=self.tmp)
+                self.AX += self.tmp
+
+            # Y step
+            np.add(self.AX, self.U, out=self.tmp)
+            self.prox_l1(self.tmp, self.threshold, out=self.Y)
+
+            # U step
+            self.U += self.AX
+            self.U -= self.Y
+
+            # normalised residuals
+            rn = max(np.linalg.norm(self.X), np.linalg.norm(self.Y)) or 1.0
+            sn = np.linalg.norm(self.U) or 1.0
+            np.subtract(self.X, self.Y, out=self.tmp)
+            r = np.linalg.norm(self.tmp) / rn
+            np.subtract(self.Yprev, self.Y, out=self.tmp)
+            s = np.linalg.norm(self.tmp) / sn
+            epri = np.sqrt(N) * opt['AbsStopTol'] / rn + opt['RelStopTol']
+            edua = np.sqrt(N) * opt['AbsStopTol'] / sn + opt['RelStopTol']
+
+            if autorho['Enabled'] and self.k != 0 and (self.k + 1) % autorho['Period'] == 0:
+                self.update_rho(r, s)
+
+            if r < epri and s < edua:
+                break
+
+        self.k += 1
+        return self.Y
+
+    def update_rho(self, r, s):
+        '''residual balancing as in sporco.admm.admm.ADMM.update_rho'''
+        autorho = self.opt['AutoRho']
+        tau, mu, xi = autorho['Scaling'], autorho['RsdlRatio'], self.rho_xi
+
+        if autorho['AutoScaling']:
+            if s == 0.0 or r == 0.0:
+                rhomlt = tau
+            else:
+                rhomlt = min(np.sqrt(r / (s * xi) if r > s * xi else (s * xi) / r), tau)
+        else:
+            rhomlt = tau
+
+        rsf = 1.0
+        if r > xi * mu * s:
+            rsf = rhomlt
+        elif s > (mu / xi) * r:
+            rsf = 1.0 / rhomlt
+
+        if rsf != 1.0:
+            self.set_rho(self.rho * rsf)
+            self.U /= rsf
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 1:40 p.m.
+# @Author  : young wang
+# @FileName: learning.py
+# @Software: PyCharm
+
+import os
+import time
+import numpy as np
+from multiprocessing import Pool
+from numpy.fft import fft, ifft
+from sporco.dictlrn import dictlrn
+from sporco.admm import cbpdn, ccmod
+from sporco import cnvrep
+from misc import processing
+
+# Module level constants
+eps = 1e-14
+n_starts = 8  # default initialisations of multistart_psf, independent of the core count
+
+
+def align_psf(D, peak=165):
+    '''circularly shift a learned PSF so that its magnitude peak
+    sits at index peak, returned in the [depth x 1] layout
+    '''
+    D = np.ravel(D)
+    shift = np.argmax(abs(D)) - peak
+    return np.roll(D, -shift).reshape(-1, 1)
+
+
+def batch_psf(s, lmbda, dic_index=None, train_index=None, Maxiter=1000):
+    '''learn a single PSF from A-lines s [depth x lines] with the
+    batch sporco DictLearn solver used in oct_cdl.py
+
+    dic_index selects the A-line used as the initial dictionary
+    (default: centre line) and train_index the training A-lines
+    (default: a random 25% of all lines)
+
+    returns the aligned PSF and the DictLearn object
+    '''
+    l2f, snorm = processing.to_l2_normed(s)
+
+    K = snorm.shape[1]  # number of A-line signal
+    M = 1  # state of dictionary
+
+    if dic_index is None:
+        dic_index = int(K / 2)
+    if train_index is None:
+        train_index = np.random.choice(K, int(0.25 * K), replace=False)
+
+    # convert to sporco standard layabout
+    D = np.reshape(snorm[:, dic_index], (-1, 1, M))
+    s_train = np.reshape(snorm[:, train_index], (-1, 1, len(train_index)))
+
+    cri = cnvrep.CDU_ConvRepIndexing(D.shape, s_train)
+
+    optx = cbpdn.ConvBPDN.Options({'Verbose': False, 'MaxMainIter': 1,
+                                   'rho': 8.13e+01, 'AuxVarObj': False})
+
+    optd = ccmod.ConvCnstrMODOptions({'Verbose': False, 'MaxMainIter': 1,
+                                      'rho': 10, 'ZeroMean': False},
+                                     method='cns')
+
+    # Dictionary support projection and normalisation (cropped).
+    Dn = cnvrep.Pcn(D, D.shape, cri.Nv, dimN=1, dimC=0, crp=False)
+
+    # Update D update options to include initial values for Y and U.
+    optd.update({'Y0': cnvrep.zpad(cnvrep.stdformD(Dn, cri.Cd, cri.M), cri.Nv),
+                 'U0': np.zeros(cri.shpD + (cri.K,))})
+
+    xstep = cbpdn.ConvBPDN(Dn, s_train, lmbda, optx)
+    dstep = ccmod.ConvCnstrMOD(None, s_train, D.shape, optd, method='cns')
+
+    opt = dictlrn.DictLearn.Options({'Verbose': False, 'MaxMainIter': Maxiter})
+    d = dictlrn.DictLearn(xstep, dstep, opt)
+
+    D1 = d.solve().squeeze()
+    return align_psf(D1), d
+
+
+def psf_cost(D, s, lmbda, Maxiter=100):
+    '''CBPDN objective of the l2 normalised A-lines s [depth x lines]
+    with the PSF D held fixed, used to compare learned PSFs
+    '''
+    _, snorm = processing.to_l2_normed(s)
+
+    opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                      'MaxMainIter': Maxiter, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                      'RelaxParam': 1.515, 'AutoRho': {'Enabled': True}})
+
+    b = cbpdn.ConvBPDN(D.reshape(-1, 1), snorm, lmbda, opt=opt_par, dimK=1, dimN=1)
+    b.solve()
+    return b.eval_objfn()[0]
+
+
+def _learn_start(args):
+    '''one multi-start run, executed in a worker process'''
+    s, lmbda, seed_seq, train_fraction, Maxiter = args
+
+    rng = np.random.default_rng(seed_seq)
+    K = s.shape[1]
+    dic_index = int(rng.integers(K))
+    train_index = np.sort(rng.choice(K, int(train_fraction * K), replace=False))
+
+    t = time.perf_counter()
+    D, d = batch_psf(s, lmbda, dic_index=dic_index, train_index=train_index, Maxiter=Maxiter)
+    solve_time = time.perf_counter() - t
+
+    # score every start on the same A-lines
+    cost = psf_cost(D, s, lmbda)
+    return D, cost, dic_index, solve_time, np.asarray(d.xstep.getitstat().ObjFun)
+
+
+def multistart_psf(s, lmbda, n_starts=n_starts, seed=0, processes=None, Maxiter=1000, train_fraction=0.25):
+    '''learn a PSF from several seeded initialisations in parallel
+    processes and keep the one with the lowest final objective
+
+    start i draws its initial A-line and its training subset from
+    np.random.default_rng(np.random.SeedSequence(seed).spawn(n_starts)[i]),
+    so a run is reproducible from (seed, n_starts) alone
+
+    parameters
+    ----------
+    s: A-lines [depth x lines]
+    n_starts: number of initialisations, fixed so that the result does
+    not depend on the machine
+    processes: worker processes, defaults to os.cpu_count()
+
+    returns the best PSF [depth x 1] and a record dict with the seed,
+    and per start the initial A-line, final objective and solve time,
+    and the learning curve of the best start
+    '''
+    if processes is None:
+        processes = os.cpu_count()
+
+    seeds = np.random.SeedSequence(seed).spawn(n_starts)
+    tasks = [(s, lmbda, seed_seq, train_fraction, Maxiter) for seed_seq in seeds]
+
+    if processes > 1:
+        with Pool(min(processes, n_starts)) as pool:
+            results = pool.map(_learn_start, tasks)
+    else:
+        results = [_learn_start(task) for task in tasks]
+
+    cost = np.array([r[1] for r in results])
+    best = int(np.argmin(cost))
+
+    record = {'seed': seed,
+              'n_starts': n_starts,
+              'dic_index': [r[2] for r in results],
+              'cost': cost,
+              'solve_time': [r[3] for r in results],
+              'best': best,
+              'ObjFun': results[best][4]}
+
+    return results[best][0], record
+
+
+def npy_batches(file_path, batch_size, decimation_factor=1, epochs=1, seed=None, chunk_size=1024):
+    '''stream mean-removed A-line batches [depth x batch_size] from
+    an .npy file of A-lines [lines x depth] without loading it
+
+    the frame mean is found in a first chunked pass, then every
+    decimation_factor-th line is visited in random order, epochs times
+    '''
+    A_lines = np.load(file_path, mmap_mode='r')
+
+    mean = np.zeros(A_lines.shape[1], dtype=np.result_type(A_lines.dtype, np.float64))
+    for i in range(0, A_lines.shape[0], chunk_size):
+        mean += np.sum(A_lines[i:i + chunk_size], axis=0, dtype=mean.dtype)
+    mean /= A_lines.shape[0]
+
+    rng = np.random.default_rng(seed)
+    index = np.arange(0, A_lines.shape[0], decimation_factor)
+
+    for _ in range(epochs):
+        order = rng.permutation(index)
+        for i in range(0, len(order), batch_size):
+            # sorted indices keep the memory map reads sequential
+            batch = np.sort(order[i:i + batch_size])
+            yield (A_lines[batch] - mean).T
+
+
+class OnlinePSFLearner:
+    '''online (minibatch) convolutional dictionary learning of a
+    single 1-D PSF
+
+    every minibatch is sparse coded with the current PSF, then the
+    PSF is updated in closed form. With a single atom the least
+    squares dictionary update decouples over frequency:
+
+    D(f) = B(f) / A(f),  A = sum |X(f)|^2,  B = sum conj(X(f)) S(f)
+
+    where A and B are running statistics decayed by forget per
+    minibatch. The PSF is then cropped to its support and l2
+    normalised, as in sporco's Pcn. The learner keeps its statistics
+    between calls, so an existing PSF can be refined as new data
+    arrives
+
+    parameters
+    ----------
+    D0: initial PSF [depth x 1], e.g. one A-line or an existing PSF
+    lmbda: sparsity regularization parameter
+    forget: decay of the running statistics per minibatch
+    prior_weight: weight of D0 in the statistics, > 0 keeps an
+    existing PSF from being forgotten after the first minibatch
+    Maxiter: CBPDN iterations per minibatch
+    '''
+
+    def __init__(self, D0, lmbda, forget=0.9, prior_weight=0.0, Maxiter=50):
+        D0 = np.ravel(D0).astype(np.complex128)
+        self.lmbda = lmbda
+        self.forget = forget
+        self.Maxiter = Maxiter
+        self.support = D0.shape[0]
+        self.D = D0 / np.linalg.norm(D0)
+
+        Df = fft(self.D)
+        self.A = np.full(self.D.shape, prior_weight, dtype=np.float64)
+        self.B = prior_weight * Df
+
+        self.n_batches = 0
+        self.n_lines = 0
+        self.cost = []
+        self.delta = []
+
+    def update(self, s):
+        '''sparse code one minibatch of A-lines s [depth x lines] with
+        the current PSF and update the PSF, returns the PSF
+        '''
+        _, snorm = processing.to_l2_normed(s)
+        N = snorm.shape[0]
+
+        opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                          'MaxMainIter': self.Maxiter, 'RelStopTol': 5e-5,
+                                          'AuxVarObj': True, 'RelaxParam': 1.515,
+                                          'AutoRho': {'Enabled': True}})
+        b = cbpdn.ConvBPDN(self.D.reshape(-1, 1), snorm, self.lmbda, opt=opt_par, dimK=1, dimN=1)
+        X = b.solve().reshape(N, -1)
+
+        Xf = fft(X, axis=0)
+        Sf = fft(snorm, axis=0)
+
+        if self.A.shape[0] != N:
+            # statistics of a PSF shorter than the A-lines live on the
+            # A-line frequency grid
+            self.A = np.full(N, self.A[0], dtype=np.float64)
+            self.B = self.A * fft(self.D, N)
+
+        self.A = self.forget * self.A + np.sum(abs(Xf) ** 2, axis=1)
+        self.B = self.forget * self.B + np.sum(np.conj(Xf) * Sf, axis=1)
+
+        D = ifft(self.B / (self.A + eps))[:self.support]
+        D = D / np.linalg.norm(D)
+
+        self.delta.append(np.linalg.norm(D - self.D))
+        self.cost.append(b.eval_objfn()[0] / snorm.shape[1])
+        self.D = D
+        self.n_batches += 1
+        self.n_lines += snorm.shape[1]
+        return self.getdict()
+
+    def solve(self, batches, time_budget=None, max_batches=None, tol=None):
+        '''consume minibatches from an iterable until it is exhausted,
+        time_budget seconds have elapsed, max_batches minibatches have
+        been used or the PSF changes by less than tol
+        '''
+        t0 = time.perf_counter()
+        for i, s in enumerate(batches):
+            self.update(s)
+
+            if max_batches is not None and i + 1 >= max_batches:
+                break
+            if time_budget is not None and time.perf_counter() - t0 >= time_budget:
+                break
+            if tol is not None and self.delta[-1] < tol:
+                break
+
+        return self.getdict()
+
+    def getdict(self):
+        '''current PSF in the [depth x 1] layout'''
+        return self.D.reshape(-1, 1)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-20 11:30 a.m.
+# @Author  : young wang
+# @FileName: prefetch.py
+# @Software: PyCharm
+
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+from misc import processing
+
+# Module level constants
+frame_width = 512  # A-lines per frame of processing.Aline_R/G/H
+
+
+class Prefetcher:
+    '''run load(item) for the items of an iterable in a background
+    thread, at most depth results ahead of the consumer
+
+    for s in Prefetcher(starts, load):
+        x = processing.make_sparse_representation(s, D, ...)
+
+    file reads and numpy FFTs release the GIL, so loading the next
+    frame overlaps with the solve of the current one. An exception in
+    load is raised in the consumer at the item that failed
+
+    the loader still competes with the solve for the cores, so it only
+    saves time when a core is free for it. On one core,
+    prefetch_benchmark.py measures no gain over serial loading at any
+    depth, and a deeper queue only holds more frames in memory
+
+    parameters
+    ----------
+    items: iterable of arguments for load
+    load: function of one item
+    depth: bound of the queue of loaded items, one frame ahead by default
+    '''
+
+    _done = object()
+
+    def __init__(self, items, load, depth=1):
+        self.queue = queue.Queue(maxsize=depth)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(items, load), daemon=True)
+        self.thread.start()
+
+    def _put(self, value):
+        # wait for room, but give up once the consumer has closed
+        while not self.stop.is_set():
+            try:
+                self.queue.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, items, load):
+        try:
+            for item in items:
+                if not self._put((load(item), None)):
+                    return
+        except Exception as e:
+            self._put((None, e))
+            return
+        self._put((self._done, None))
+
+    def __iter__(self):
+        while True:
+            value, error = self.queue.get()
+            if error is not None:
+                self.close()
+                raise error
+            if value is self._done:
+                return
+            yield value
+
+    def close(self):
+        '''stop the loader thread, e.g. when the consumer stops early'''
+        self.stop.set()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_raw(file_path):
+    '''raw interferograms [lines x samples], memory mapped for .npy so
+    that a frame only reads its own lines, loaded for .npz (key arr_1)
+    '''
+    if Path(file_path).suffix == '.npy':
+        if not Path(file_path).is_file():
+            raise Exception("Dataset %s not found" % file_path)
+        return np.load(file_path, mmap_mode='r')
+    return processing.load_raw(file_path)
+
+
+def raw_frame(raw, start, decimation_factor, window='hann', std=None):
+    '''one mean removed A-line frame from raw interferograms, as
+    processing.mean_remove(processing.Aline_H(raw, start), decimation_factor)
+
+    only the frame's dwell * 512 lines are read and transformed, not
+    the whole recording
+
+    parameters
+    ----------
+    window: 'hann' (Aline_H), 'gaussian' (Aline_G, needs std) or None (Aline_R)
+    '''
+    dwell = processing.dwell
+    data = np.asarray(raw[dwell * start:dwell * (start + frame_width)])
+    if window == 'hann':
+        A_line = processing.Aline_H(data, 0)
+    elif window == 'gaussian':
+        A_line = processing.Aline_G(data, 0, std)
+    else:
+        A_line = processing.Aline_R(data, 0)
+    return processing.mean_remove(A_line, decimation_factor)
+
+
+def raw_frames(file_path, starts, decimation_factor, depth=1, window='hann', std=None):
+    '''Prefetcher of the A-line frames beginning at each of starts'''
+    raw = open_raw(file_path)
+    return Prefetcher(starts, lambda start: raw_frame(raw, start, decimation_factor, window, std), depth)
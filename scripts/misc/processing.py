@@ -4,29 +4,28 @@
 # @FileName: processing.py
 # @Software: PyCharm
 
-from sporco import prox
 from pathlib import Path
-from skimage.morphology import disk,square,star,diamond,octagon
-from skimage.morphology import dilation, erosion
-from skimage import filters
-from scipy.signal import find_peaks
-from scipy.ndimage import gaussian_filter
 from numpy.fft import fft, fftshift, ifft
-from scipy import signal
 import numpy as np
 import pickle
-from sporco.admm import cbpdn
+from misc import profiling
+from misc.profiling import Profile, SolverLog
 
 # Module level constants
 eps = 1e-14
 dwell = 20
 lmbda = 1e-1
+# lateral reach of the getWeight mask in A-lines: morphology (1 + 1),
+# median 17 (8), sobel (1), median 7 (3), gaussian (2) and median 12 (6),
+# 22 in all
+mask_halo = 22
 
 def Aline_R(data,start):
     A_line = ifft(data, axis=1)
     return A_line[dwell * start:dwell * (start + 512), -350:-20].T
 
 def Aline_G(data,start,std):
+    from scipy import signal
     window = signal.windows.gaussian(data.shape[1], std=std)
     temp = data*window
     A_line = ifft(temp, axis=1)
@@ -61,15 +60,135 @@ def imag2uint(data, vmin, vmax):
     pixel_vals = np.uint8(np.around(255 * (data - vmin) / (vmax - vmin), 0))
     return pixel_vals
 
+def display_lut(vmin, vmax):
+    '''lookup table for log_uint8 over the magnitude squared p
+
+    level k of imag2uint(10 log10(p), vmin, vmax) is the number of level
+    thresholds <= p. The table is indexed by the top bits of the float64
+    p (exponent and 8 mantissa bits), a bin of 1/256 octave that holds at
+    most one threshold, and stores the level at the start of each bin.
+    The threshold of the next level, checked per pixel, makes it exact
+    '''
+    levels = vmin + (np.arange(1, 256) - 0.5) * (vmax - vmin) / 255
+    thresholds = 10 ** (levels / 10)
+
+    starts = (np.arange(1 << 19, dtype=np.uint64) << np.uint64(44)).view(np.float64)
+    table = np.searchsorted(thresholds, starts, side='right').astype(np.uint8)
+    return table, np.append(thresholds, np.inf)
+
+def log_uint8(x, vmin, vmax, out=None, lut=None, intensity=False, chunk_size=1 << 14):
+    '''fused imag2uint(20 log10(abs(x)), vmin, vmax)
+
+    works on the magnitude squared (no sqrt) in chunks of chunk_size
+    pixels, so the only full size array is the uint8 output, which can
+    be a preallocated buffer. With lut from display_lut(vmin, vmax) the
+    log is replaced by a table lookup on the float bits of p
+
+    parameters
+    ----------
+    x: complex or real amplitude, or magnitude squared if intensity
+    out: uint8 array of the shape of x
+    '''
+    x = np.asarray(x)
+    if out is None:
+        out = np.empty(x.shape, dtype=np.uint8)
+    assert out.shape == x.shape and out.dtype == np.uint8, 'out must be uint8 of the shape of x'
+
+    x_flat = x.reshape(-1)
+    out_flat = out.reshape(-1)
+    scale = 255 / (vmax - vmin)
+
+    p = np.empty(min(chunk_size, x_flat.size))
+    temp = np.empty_like(p)
+    if lut is not None:
+        table, thresholds = lut
+        key = np.empty(p.shape, dtype=np.uint64)
+        bump = np.empty(p.shape, dtype=bool)
+    for i in range(0, x_flat.size, chunk_size):
+        chunk = x_flat[i:i + chunk_size]
+        n = chunk.size
+        p_n, temp_n = p[:n], temp[:n]
+
+        if intensity:
+            # a magnitude squared below 0 (rounding, or -0.0) is level 0,
+            # as the log of 0 is
+            np.maximum(chunk, 0, out=p_n)
+        elif np.iscomplexobj(chunk):
+            np.multiply(chunk.real, chunk.real, out=p_n)
+            np.multiply(chunk.imag, chunk.imag, out=temp_n)
+            p_n += temp_n
+        else:
+            np.multiply(chunk, chunk, out=p_n)
+
+        if lut is not None:
+            level = out_flat[i:i + n]
+            np.right_shift(p_n.view(np.uint64), np.uint64(44), out=key[:n])
+            # the sign bit of a -0.0 left by np.maximum is outside the table
+            np.bitwise_and(key[:n], np.uint64((1 << 19) - 1), out=key[:n])
+            np.take(table, key[:n], out=level)
+            np.take(thresholds, level, out=temp_n)
+            np.greater_equal(p_n, temp_n, out=bump[:n])
+            level += bump[:n]
+        else:
+            with np.errstate(divide='ignore'):
+                np.log10(p_n, out=p_n)
+            p_n *= 10 * scale
+            p_n -= vmin * scale
+            np.clip(p_n, 0, 255, out=p_n)
+            np.rint(p_n, out=p_n)
+            out_flat[i:i + n] = p_n
+
+    return out
+
 def display_range(data, vmin, vmax):
     return np.clip(data, vmin, vmax)
 
-def to_l2_normed(s):
-    l2f = prox.norm_l2(s, axis=0).squeeze()
-    return (l2f, s / l2f)
+def l2_norms(s, out=None):
+    '''the l2 norm of every A-line (column) of s, as
+    sporco.prox.norm_l2(s, axis=0), summed over the real and imaginary
+    views of s so that no |s| ** 2 temporaries are allocated
+    '''
+    ss = np.einsum('i...,i...->...', s.real, s.real)
+    if np.iscomplexobj(s):
+        ss += np.einsum('i...,i...->...', s.imag, s.imag)
+    return np.sqrt(ss, out=out)
+
+def to_l2_normed(s, l2f=None, out=None):
+    '''the A-line norms l2f and the normalised frame s / l2f
 
-def from_l2_normed(s, l2f):
-    return (s * l2f)
+    l2f computed earlier for the same frame is reused, out is an
+    optional preallocated buffer (or s itself) for s / l2f
+    '''
+    if l2f is None:
+        l2f = l2_norms(s)
+    return (l2f, np.divide(s, l2f, out=out))
+
+def from_l2_normed(s, l2f, out=None):
+    return np.multiply(s, l2f, out=out)
+
+def centred_psf(D, n=None):
+    '''the PSF zero padded to n rows and circularly shifted so that its
+    peak np.argmax(D) is at row 0, and that shift
+
+    a circular convolution with the centred PSF places every echo at the
+    depth of its scatterer, so a sparse code solved with it is already in
+    image coordinates and needs no np.roll(x, shift)
+    '''
+    shift = int(np.argmax(D))
+    if n is not None and n > D.shape[0]:
+        D = np.concatenate([D, np.zeros((n - D.shape[0],) + D.shape[1:], dtype=D.dtype)])
+    return np.roll(D, -shift, axis=0), shift
+
+def roll_add(a, shift, value):
+    '''np.roll(a, shift, axis=0) + value, written in one pass from two
+    row slices of a instead of a rolled copy and a sum
+    '''
+    n = a.shape[0]
+    shift %= n
+    out = np.empty_like(a)
+    np.add(a[:n - shift], value, out=out[shift:])
+    np.add(a[n - shift:], value, out=out[:shift])
+    return out
 
 def load_data(dataset_name, decimation_factor, data_only=False):
     # check if such file exists
@@ -109,58 +228,83 @@ def load_data(dataset_name, decimation_factor, data_only=False):
             raise Exception("Dataset %s not found" % dataset_name)
 
 
-def getWeight(s, D, w_lmbda, speckle_weight, Paddging=True, opt_par={},Ear = False):
-    l2f, snorm = to_l2_normed(s)
-
-    b = cbpdn.ConvBPDN(D, snorm, w_lmbda, opt=opt_par, dimK=1, dimN=1)
-    # Calculate the sparse vector and an an epsilon to keep the log finite
-    xnorm = b.solve().squeeze() + eps
-    # Caclulate sparse reconstruction
-    xnorm = np.roll(xnorm, np.argmax(D), axis=0)
+def getWeight(s, D, w_lmbda, speckle_weight, Paddging=True, opt_par={},Ear = False, normed=None,
+              centred=None):
+    ''' normed -- (l2f, snorm) of to_l2_normed(s) when the caller has it
+    already, so the frame is normalised once for both passes
+    centred -- centred_psf(D), likewise
+    '''
+    with profiling.stage('getWeight'):
+        return _getWeight(s, D, w_lmbda, speckle_weight, Paddging, opt_par, Ear, normed, centred)
+
+def _getWeight(s, D, w_lmbda, speckle_weight, Paddging, opt_par, Ear, normed, centred):
+    from sporco.admm import cbpdn
+    from skimage.morphology import square, dilation, erosion
+    from skimage import filters
+    from scipy.signal import find_peaks
+    from scipy.ndimage import gaussian_filter
+
+    if normed is None:
+        with profiling.stage('normalise'):
+            normed = to_l2_normed(s)
+    l2f, snorm = normed
+    if centred is None:
+        centred = centred_psf(D)
+
+    with profiling.stage('weight solve'):
+        # the centred PSF returns the sparse vector in image coordinates
+        b = cbpdn.ConvBPDN(centred[0], snorm, w_lmbda, opt=opt_par, dimK=1, dimN=1)
+        profiling.watch(b)
+        # Calculate the sparse vector and an an epsilon to keep the log finite
+        xnorm = b.solve().squeeze() + eps
+        profiling.solver(b, 'weight solve')
 
     # Convert back from normalized
     rvmin, vmax = 5, 55
-    x = from_l2_normed(xnorm, l2f)
-    x_log = 10 * np.log10(abs(x) ** 2)
-    x_log = imag2uint(x_log, rvmin, vmax)
+    with profiling.stage('log compression'):
+        x = from_l2_normed(xnorm, l2f, out=xnorm)
+        x_log = log_uint8(x, rvmin, vmax)
 
-    # set thresdhold
-    x_log = np.where(x_log <= rvmin, 0, x_log)
-    W = dilation(x_log, square(3))
-    W = erosion(W, square(3))
-    W = np.where(W > 0, speckle_weight, 1)
+    with profiling.stage('morphology'):
+        # set thresdhold
+        x_log = np.where(x_log <= rvmin, 0, x_log)
+        W = dilation(x_log, square(3))
+        W = erosion(W, square(3))
+        W = np.where(W > 0, speckle_weight, 1)
 
-    if Ear == True:
+        if Ear == True:
 
-        W = filters.median(W, square(7))
+            W = filters.median(W, square(7))
 
-    else:
+        else:
 
-        W = filters.median(W, square(17))
+            W = filters.median(W, square(17))
 
     if Paddging == True:
-        pad = 20  #
-        # find the bottom edge of the mask with Sobel edge filter
-
-        temp = filters.sobel(W)
-        # temp = gaussian_filter(temp, 3)
-
-        pad_value = np.linspace(speckle_weight, 1, pad)
-
-        for i in range(temp.shape[1]):
-            peak, _ = find_peaks(temp[:, i], height=0)
-            if len(peak) != 0:
-                loc = peak[-1]
-                if temp.shape[0] - loc >= pad:
-                    W[loc:int(loc + pad), i] = pad_value
-            else:
-                W[:, i] = W[:, i]
+        with profiling.stage('padding'):
+            pad = 20  #
+            # find the bottom edge of the mask with Sobel edge filter
+
+            temp = filters.sobel(W)
+            # temp = gaussian_filter(temp, 3)
+
+            pad_value = np.linspace(speckle_weight, 1, pad)
+
+            for i in range(temp.shape[1]):
+                peak, _ = find_peaks(temp[:, i], height=0)
+                if len(peak) != 0:
+                    loc = peak[-1]
+                    if temp.shape[0] - loc >= pad:
+                        W[loc:int(loc + pad), i] = pad_value
+                else:
+                    W[:, i] = W[:, i]
     else:
         pass
 
-    W = filters.median(W, square(7))
-    W = gaussian_filter(W, sigma=0.5)
-    W = filters.median(W, square(12))
+    with profiling.stage('smoothing'):
+        W = filters.median(W, square(7))
+        W = gaussian_filter(W, sigma=0.5)
+        W = filters.median(W, square(12))
 
     W = np.reshape(W, (W.shape[0], 1, -1, 1))
 
@@ -168,10 +312,17 @@ def getWeight(s, D, w_lmbda, speckle_weight, Paddging=True, opt_par={},Ear = Fal
 
 def make_sparse_representation(s, D, lmbda,w_lmbda, speckle_weight,
                                Line=False, index=None, Mask=False, Ear =False):
+    with profiling.frame(), profiling.stage('make_sparse_representation'):
+        return _make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Line, index, Mask, Ear)
+
+def _make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Line, index, Mask, Ear):
     ''' s -- 2D array of complex A-lines with dims (width, depth)
     '''
+    from sporco.admm import cbpdn
+
     # l2 norm data and save the scaling factor
-    l2f, snorm = to_l2_normed(s)
+    with profiling.stage('normalise'):
+        l2f, snorm = to_l2_normed(s)
 
     opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
                                       'MaxMainIter': 20, 'RelStopTol': 5e-5, 'AuxVarObj': True,
@@ -184,32 +335,164 @@ def make_sparse_representation(s, D, lmbda,w_lmbda, speckle_weight,
     # else:
     #     pass
 
-    W = np.roll(getWeight(s, D, w_lmbda, speckle_weight, Paddging=True, opt_par=opt_par,Ear = Ear), np.argmax(D), axis=0)
+    D_centred, shift = centred = centred_psf(D)
+    W_mask = getWeight(s, D, w_lmbda, speckle_weight, Paddging=True, opt_par=opt_par,Ear = Ear,
+                       normed=(l2f, snorm), centred=centred)
     opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
                                       'MaxMainIter': 200, 'RelStopTol': 5e-5, 'AuxVarObj': True,
-                                      'RelaxParam': 1.515, 'L1Weight': W, 'AutoRho': {'Enabled': True}})
+                                      'RelaxParam': 1.515, 'L1Weight': W_mask, 'AutoRho': {'Enabled': True}})
 
-    b = cbpdn.ConvBPDN(D, snorm, lmbda, opt=opt_par, dimK=1, dimN=1)
+    # the weight has always been applied as np.roll(W_mask, shift) to the
+    # code of the uncentred PSF, i.e. 2 * shift rows below the image. With
+    # the PSF rolled by shift the code is in the layout of W_mask and that
+    # offset moves onto the code, where roll_add applies it in the copy
+    # that adds eps, so neither the mask nor the code is rolled
+    with profiling.stage('weighted solve'):
+        b = cbpdn.ConvBPDN(np.roll(D_centred, 2 * shift, axis=0), snorm, lmbda, opt=opt_par, dimK=1, dimN=1)
+        profiling.watch(b)
 
-    xnorm = b.solve().squeeze() + eps
-    # calculate sparsity
-    xnorm = np.roll(xnorm, np.argmax(D), axis=0)
+        xnorm = roll_add(b.solve().squeeze(), 2 * shift, eps)
+        profiling.solver(b, 'weighted solve')
 
     if Line == False and Mask == False:
         ## Convert back from normalized
-        x = from_l2_normed(xnorm, l2f)
+        x = from_l2_normed(xnorm, l2f, out=xnorm)
         return (x)
     elif Line == True and Mask == False:
         assert index != None and 0 <= index <= s.shape[1]
-        x = from_l2_normed(xnorm, l2f)
         x_line = abs(xnorm[:, index])
+        x = from_l2_normed(xnorm, l2f, out=xnorm)
         return x, x_line
     elif Line == False and Mask == True:
-        x = from_l2_normed(xnorm, l2f)
-        W_mask = np.roll(W, -np.argmax(D), axis=0).squeeze()
-        return x, W_mask
+        x = from_l2_normed(xnorm, l2f, out=xnorm)
+        return x, W_mask.squeeze()
     else:
-        x = from_l2_normed(xnorm, l2f)
         x_line = abs(xnorm[:, index])
-        W_mask = np.roll(W, -np.argmax(D), axis=0).squeeze()
-        return x, x_line, W_mask
+        x = from_l2_normed(xnorm, l2f, out=xnorm)
+        return x, x_line, W_mask.squeeze()
+
+def depth_bands(depth, n_bands):
+    '''boundaries of n_bands equal bands of depth rows, band i being
+    rows edges[i]:edges[i + 1]
+    '''
+    return np.linspace(0, depth, n_bands + 1).astype(int)
+
+def make_depth_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Ear=False):
+    ''' deconvolution with a PSF that changes with depth
+
+    s -- 2D array of complex A-lines with dims (width, depth)
+    D -- list of full length PSFs [depth x 1], one per equal depth band from top to bottom
+
+    a single full-depth solve with one coefficient map per band: map i
+    is convolved with the centred PSF i and held to band i by its L1
+    weight, which is band_penalty outside the band. A scatterer is thus
+    blurred by the PSF of its own depth, with all sidelobes, and the
+    forward model is the sum of the maps' convolutions, so nothing wraps
+    around at band edges and the bands share the FFTs of one solve. With
+    the same PSF in every band this is the problem of
+    make_sparse_representation, the mask of every band is placed as
+    make_sparse_representation places it (2 * shift rows from
+    getWeight's, for the shift of the band's PSF). A solve costs about
+    n_bands times a single-PSF solve
+    '''
+    with profiling.frame(), profiling.stage('make_depth_sparse_representation'):
+        return _make_depth_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Ear)
+
+def _make_depth_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Ear):
+    from sporco.admm import cbpdn
+
+    # weight of a map outside its band, large enough that the l1
+    # shrinkage zeroes every coefficient there
+    band_penalty = 1e6
+
+    assert all(np.shape(D_i)[0] == s.shape[0] for D_i in D), 'PSFs span the full depth'
+
+    # l2 norm data and save the scaling factor
+    with profiling.stage('normalise'):
+        l2f, snorm = to_l2_normed(s)
+    centred = [centred_psf(D_i) for D_i in D]
+
+    opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                      'MaxMainIter': 20, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                      'RelaxParam': 1.515, 'AutoRho': {'Enabled': True}})
+
+    # one weighting mask in image coordinates for all bands
+    W_mask = getWeight(s, D[len(D) // 2], w_lmbda, speckle_weight, Paddging=True, opt_par=opt_par, Ear=Ear,
+                       normed=(l2f, snorm), centred=centred[len(D) // 2])
+
+    edges = depth_bands(s.shape[0], len(D))
+    W = np.full(W_mask.shape[:-1] + (len(D),), band_penalty)
+    for i, (_, shift) in enumerate(centred):
+        rows = np.arange(edges[i], edges[i + 1])
+        W[rows, ..., i] = np.take(W_mask[..., 0], rows - 2 * shift, axis=0, mode='wrap')
+
+    opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                      'MaxMainIter': 200, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                      'RelaxParam': 1.515, 'L1Weight': W, 'AutoRho': {'Enabled': True}})
+
+    with profiling.stage('weighted solve'):
+        b = cbpdn.ConvBPDN(np.concatenate([D_i for D_i, _ in centred], axis=1), snorm, lmbda, opt=opt_par,
+                           dimK=1, dimN=1)
+        profiling.watch(b)
+        # every map is zero outside its band, so the sum is the image
+        xnorm = b.solve().sum(axis=-1).squeeze() + eps
+        profiling.solver(b, 'weighted solve')
+
+    return from_l2_normed(xnorm, l2f, out=xnorm)
+
+def lateral_tiles(width, tile_width, halo=mask_halo):
+    '''split width A-lines into tiles of tile_width lines, return the
+    (start, stop) lines of each tile and of the tile extended by halo
+    lines on either side
+    '''
+    starts = np.arange(0, width, tile_width)
+    tiles = [(start, min(start + tile_width, width)) for start in starts]
+    padded = [(max(0, start - halo), min(stop + halo, width)) for start, stop in tiles]
+    return tiles, padded
+
+def _solve_tile(args):
+    '''one tile of make_tiled_sparse_representation, executed in a worker process'''
+    s, D, lmbda, w_lmbda, speckle_weight, Ear, log = args
+    if log:
+        # the parent's SolverLog is not shared with the worker
+        return profiling.logged(make_sparse_representation, s, D, lmbda, w_lmbda, speckle_weight, Ear=Ear)
+    return make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Ear=Ear), None
+
+def make_tiled_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight,
+                                     tile_width=256, halo=mask_halo, processes=1, Ear=False):
+    ''' make_sparse_representation of a wide frame in lateral tiles
+
+    s -- 2D array of complex A-lines with dims (width, depth)
+
+    the convolution is along depth only and the getWeight filters reach
+    at most mask_halo A-lines sideways, so every tile is solved with
+    halo extra lines on either side and only its own lines are kept.
+    Memory is bounded by the tile size, not the frame width. The tiles
+    match the monolithic solve up to the solver tolerance, as the ADMM
+    step size and the stopping test of a tile only see its own lines
+
+    processes > 1 solves the tiles in a process pool, whose solver
+    logs are merged into the active SolverLog
+    '''
+    tiles, padded = lateral_tiles(s.shape[1], tile_width, halo)
+    log = processes > 1 and profiling.is_logging()
+    tasks = [(s[:, start:stop], D, lmbda, w_lmbda, speckle_weight, Ear, log) for start, stop in padded]
+
+    # the tiles are solves of one frame
+    with profiling.frame():
+        if processes > 1:
+            from multiprocessing import Pool
+            with Pool(min(processes, len(tasks))) as pool:
+                results = pool.imap(_solve_tile, tasks)
+                x = _stitch(results, s, tiles, padded)
+        else:
+            x = _stitch(map(_solve_tile, tasks), s, tiles, padded)
+    return x
+
+def _stitch(results, s, tiles, padded):
+    '''copy the core lines of every solved tile into the frame'''
+    x = np.empty(s.shape, dtype=complex)
+    for (x_tile, log), (start, stop), (pad_start, _) in zip(results, tiles, padded):
+        profiling.merge(log)
+        x[:, start:stop] = x_tile[:, start - pad_start:stop - pad_start]
+    return x
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 10:05 p.m.
+# @Author  : young wang
+# @FileName: profiling.py
+# @Software: PyCharm
+
+import json
+import time
+import tracemalloc
+import numpy as np
+from contextlib import nullcontext
+
+# one record per finished stage
+record_dtype = np.dtype([('stage', 'U128'),
+                         ('depth', np.int32),
+                         ('wall', np.float64),
+                         ('iterations', np.int32),
+                         ('rho', np.float64),
+                         ('primal_residual', np.float64),
+                         ('dual_residual', np.float64),
+                         ('allocated', np.int64),
+                         ('peak', np.int64)])
+
+# per-iteration columns of SolverLog, names as in sporco's IterationStats
+solver_columns = ('Iter', 'ObjFun', 'DFid', 'RegL1', 'PrimalRsdl', 'DualRsdl', 'Rho')
+
+# the active Profile and SolverLog, None when disabled
+_active = None
+_log = None
+_disabled = nullcontext()
+# open frame() blocks, only the outermost starts a frame
+_frame_depth = 0
+
+
+class Profile:
+    '''record per-stage wall time, solver iterations and residuals, and
+    optionally memory allocations, of the instrumented processing calls
+    made inside the with block
+
+    with processing.Profile(memory=True) as prof:
+        x = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight)
+    print(prof.table())
+
+    stages nest, a record's stage is the path of stage names joined by
+    '/'. With profiling disabled, stage() returns a shared null context
+    and solver() returns at once
+
+    parameters
+    ----------
+    memory: trace numpy/python allocations with tracemalloc, reported
+    as the net bytes allocated and the peak above the stage start
+    callback: called with every record dict as its stage finishes
+    '''
+
+    def __init__(self, memory=False, callback=None):
+        self.memory = memory
+        self.callback = callback
+        self.records = []
+        self._stack = []
+
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        _active = self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        else:
+            self._started = False
+        return self
+
+    def __exit__(self, *args):
+        global _active
+        _active = self._previous
+        if self._started:
+            tracemalloc.stop()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def to_array(self):
+        '''records as a structured array of record_dtype'''
+        array = np.zeros(len(self.records), dtype=record_dtype)
+        for i, record in enumerate(self.records):
+            for key, value in record.items():
+                array[i][key] = value
+        return array
+
+    def to_json(self, file_path=None):
+        text = json.dumps(self.records, indent=2)
+        if file_path is not None:
+            with open(file_path, 'w') as f:
+                f.write(text)
+                f.close()
+        return text
+
+    def table(self):
+        '''one line per record, indented by depth'''
+        lines = ['%-48s %10s %6s %12s %12s' % ('stage', 'wall [ms]', 'iter', 'residual r', 'peak [MB]')]
+        for record in self.records:
+            name = '  ' * record['depth'] + record['stage'].split('/')[-1]
+            iterations = '%d' % record['iterations'] if record['iterations'] else ''
+            residual = '%.2e' % record['primal_residual'] if record['iterations'] else ''
+            peak = '%.1f' % (record['peak'] / 2 ** 20) if self.memory else ''
+            lines.append('%-48s %10.2f %6s %12s %12s' % (name, 1e3 * record['wall'], iterations, residual, peak))
+        return '\n'.join(lines)
+
+
+class _Stage:
+    '''timer of one stage of the active Profile'''
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        profile = self.profile
+        path = '/'.join([s.record['stage'] for s in profile._stack[-1:]] + [self.name])
+        self.record = {'stage': path, 'depth': len(profile._stack), 'wall': 0.0, 'iterations': 0,
+                       'rho': np.nan, 'primal_residual': np.nan, 'dual_residual': np.nan,
+                       'allocated': 0, 'peak': 0}
+        # records are listed in the order the stages start
+        profile.records.append(self.record)
+        if profile.memory and profile._stack:
+            # the parent's peak so far is lost with the reset below, keep it
+            parent = profile._stack[-1]
+            parent.max_memory = max(parent.max_memory, tracemalloc.get_traced_memory()[1])
+        profile._stack.append(self)
+
+        if profile.memory:
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+            self.max_memory = self.start_memory
+            tracemalloc.reset_peak()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.record['wall'] = time.perf_counter() - self.t0
+        profile = self.profile
+        profile._stack.pop()
+
+        if profile.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.max_memory = max(self.max_memory, peak)
+            self.record['allocated'] = current - self.start_memory
+            self.record['peak'] = self.max_memory - self.start_memory
+            if profile._stack:
+                # the peak counter was reset for this stage, hand it on
+                parent = profile._stack[-1]
+                parent.max_memory = max(parent.max_memory, self.max_memory)
+
+        if profile.callback is not None:
+            profile.callback(self.record)
+
+
+def stage(name):
+    '''context manager timing a stage of the active Profile'''
+    if _active is None:
+        return _disabled
+    return _active.stage(name)
+
+
+def watch(b):
+    '''have a sporco ADMM object record its iteration statistics while a
+    SolverLog is active (FastSolve off, which does not change the iterates)
+    '''
+    if _log is not None:
+        b.opt['FastSolve'] = False
+
+
+def solver(b, name):
+    '''after b.solve(): add the iteration count, final rho and normalised
+    residuals to the innermost stage of the active Profile, and the
+    iteration statistics to the active SolverLog
+    '''
+    if _log is not None:
+        _log.append(b, name)
+    if _active is None or not _active._stack:
+        return
+    r, s, _, _ = b.compute_residuals()
+    _active._stack[-1].record.update({'iterations': b.k, 'rho': float(b.rho),
+                                      'primal_residual': float(r), 'dual_residual': float(s)})
+
+
+class _Frame:
+    '''one frame of the active SolverLog, see frame()'''
+
+    def __enter__(self):
+        global _frame_depth
+        if _frame_depth == 0:
+            _log.n_frames += 1
+        _frame_depth += 1
+        return self
+
+    def __exit__(self, *args):
+        global _frame_depth
+        _frame_depth -= 1
+
+
+def frame():
+    '''context manager around the processing of one frame, the solves
+    inside it are logged as one frame of the active SolverLog. Nested
+    frame() blocks, e.g. the tiles of make_tiled_sparse_representation
+    or the runs of PSFBank.deconvolve, belong to the enclosing frame
+    '''
+    if _log is None:
+        return _disabled
+    return _Frame()
+
+
+def is_logging():
+    '''whether a SolverLog is active, e.g. to have worker processes
+    record one with logged()
+    '''
+    return _log is not None
+
+
+def logged(function, *args, **kwargs):
+    '''function(*args, **kwargs) with its solves recorded in a new
+    SolverLog, returns the result and the log. Used in worker
+    processes, whose logs are folded into the parent's with merge()
+    '''
+    with SolverLog() as log:
+        result = function(*args, **kwargs)
+    return result, log
+
+
+def merge(log):
+    '''add the rows of a SolverLog recorded in a worker process to the
+    current frame of the active SolverLog
+    '''
+    if _log is not None and log is not None:
+        _log.extend(log, max(_log.n_frames - 1, 0))
+
+
+class SolverLog:
+    '''columnar per-iteration log of the CBPDN solves made inside the
+    with block, aggregated over frames
+
+    with processing.SolverLog() as log:
+        for s in frames:
+            processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight)
+    log.save('solver_log.npz')
+
+    every iteration is a row with the frame index, the solve name
+    ('weight solve' or 'weighted solve') and the columns of
+    solver_columns. Rows are kept in flat arrays, so a long run costs
+    a few numbers per iteration
+
+    solves in worker processes (make_tiled_sparse_representation with
+    processes > 1, shm.FramePipeline) are logged in the workers and
+    merged into the log of the parent. Profile records of worker
+    processes are not returned
+    '''
+
+    def __init__(self):
+        self.n_frames = 0
+        self.columns = {key: [] for key in ('frame', 'solve') + solver_columns}
+        self.solves = []
+
+    def __enter__(self):
+        global _log
+        self._previous = _log
+        _log = self
+        return self
+
+    def __exit__(self, *args):
+        global _log
+        _log = self._previous
+
+    def append(self, b, name):
+        itstat = b.getitstat()
+        if itstat is None:
+            return
+        if name not in self.solves:
+            self.solves.append(name)
+
+        n = len(itstat.Iter)
+        self.columns['frame'].append(np.full(n, max(self.n_frames - 1, 0), dtype=np.int32))
+        self.columns['solve'].append(np.full(n, self.solves.index(name), dtype=np.int8))
+        for key in solver_columns:
+            self.columns[key].append(np.asarray(getattr(itstat, key)))
+
+    def extend(self, other, frame):
+        '''append the rows of another SolverLog, its frame indices
+        offset by frame
+        '''
+        for name in other.solves:
+            if name not in self.solves:
+                self.solves.append(name)
+        solve_index = np.array([self.solves.index(name) for name in other.solves], dtype=np.int8)
+
+        self.columns['frame'] += [f + frame for f in other.columns['frame']]
+        self.columns['solve'] += [solve_index[s] for s in other.columns['solve']]
+        for key in solver_columns:
+            self.columns[key] += other.columns[key]
+
+    def __getitem__(self, key):
+        '''one column over all logged iterations'''
+        if not self.columns[key]:
+            return np.empty(0)
+        return np.concatenate(self.columns[key])
+
+    def to_dict(self):
+        return {key: self[key] for key in self.columns}
+
+    def save(self, file_path):
+        '''columns to an .npz file, solve names in solve_names'''
+        np.savez_compressed(file_path, solve_names=np.array(self.solves), **self.to_dict())
+
+    def summary(self, max_iterations=None):
+        '''per solve name: number of solves, mean and max iterations,
+        fraction that reached max_iterations[name] (a dict of iteration
+        caps per solve name, if given) and the median
+        final residuals and rho
+        '''
+        frame, solve, Iter = self['frame'], self['solve'], self['Iter']
+        # the last row of every solve
+        last = np.flatnonzero(np.append(np.diff(Iter) <= 0, True))
+
+        summary = {}
+        for i, name in enumerate(self.solves):
+            rows = last[solve[last] == i]
+            iterations = Iter[rows] + 1
+            summary[name] = {'solves': len(rows),
+                             'frames': len(np.unique(frame[rows])),
+                             'mean_iterations': float(np.mean(iterations)),
+                             'max_iterations': int(np.max(iterations)),
+                             'PrimalRsdl': float(np.median(self['PrimalRsdl'][rows])),
+                             'DualRsdl': float(np.median(self['DualRsdl'][rows])),
+                             'Rho': float(np.median(self['Rho'][rows]))}
+            if max_iterations is not None:
+                summary[name]['capped'] = float(np.mean(iterations >= max_iterations[name]))
+        return summary
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 10:12 a.m.
+# @Author  : young wang
+# @FileName: psf.py
+# @Software: PyCharm
+
+import numpy as np
+from numpy.fft import fft, ifft, rfft, irfft
+
+# Module level constants
+eps = 1e-14
+
+peak_dtype = np.dtype([('peak_index', np.int64),
+                       ('peak_value', np.float64),
+                       ('sidelobe_index', np.int64),
+                       ('sidelobe_value', np.float64),
+                       ('background', np.float64),
+                       ('sidelobe_level', np.float64),
+                       ('dynamic_range', np.float64)])
+
+
+def as_batch(D):
+    '''arrange PSFs in the [depth x n] layout used for A-lines,
+    a single PSF of shape [depth] or [depth x 1] becomes [depth x 1]
+    '''
+    D = np.asarray(D)
+    return D.reshape(D.shape[0], -1)
+
+
+def log_psf(D):
+    '''20 log10 magnitude of each PSF column, offset so that its
+    minimum is 0 dB
+    '''
+    D_log = 20 * np.log10(np.abs(as_batch(D)) + eps)
+    return D_log - np.min(D_log, axis=0)
+
+
+def locate_peaks(D, mask_size=10, include_range=15, dB=True, height='mean'):
+    '''characterise a batch of PSFs
+
+    parameters
+    ----------
+    D: array_like
+    PSFs with dimension [depth x n], each column is one PSF
+    mask_size: the nearest sidelobe is searched within this many
+    samples of the main lobe
+    include_range: samples within this range of the main lobe are
+    excluded from the background estimate
+    dB: if True the background is the average of the log magnitude,
+    otherwise the log of the average of the complex PSF
+    height: 'mean' or 'median', minimum log magnitude of a peak
+
+    returns a structured array of length n with fields peak_index,
+    peak_value, sidelobe_index, sidelobe_value, background,
+    sidelobe_level (main lobe - sidelobe) and dynamic_range
+    (main lobe - background), all levels in dB. sidelobe_index is -1
+    and sidelobe_value nan where no sidelobe is found
+
+    peaks are strict local maxima, so unlike scipy.signal.find_peaks
+    flat-topped peaks are not reported
+    '''
+    D = as_batch(D)
+    D_log = log_psf(D)
+    depth, n = D_log.shape
+    cols = np.arange(n)
+
+    if height == 'mean':
+        threshold = np.mean(D_log, axis=0)
+    elif height == 'median':
+        threshold = np.median(D_log, axis=0)
+    else:
+        raise ValueError("height must be 'mean' or 'median'")
+
+    # interior local maxima above the threshold
+    is_peak = np.zeros(D_log.shape, dtype=bool)
+    is_peak[1:-1] = (D_log[1:-1] > D_log[:-2]) & (D_log[1:-1] > D_log[2:])
+    is_peak &= D_log >= threshold
+
+    peak_log = np.where(is_peak, D_log, -np.inf)
+    peak_index = np.argmax(peak_log, axis=0)
+    peak_value = D_log[peak_index, cols]
+
+    # nearest sidelobe: highest lower peak within mask_size of the main lobe
+    index = np.arange(depth)[:, np.newaxis]
+    offset = np.abs(index - peak_index)
+    near = is_peak & (offset <= mask_size) & (D_log < peak_value)
+    near_log = np.where(near, D_log, -np.inf)
+    sidelobe_index = np.argmax(near_log, axis=0)
+    found = np.any(near, axis=0)
+    sidelobe_value = np.where(found, D_log[sidelobe_index, cols], np.nan)
+    sidelobe_index = np.where(found, sidelobe_index, -1)
+
+    # background: everything outside the main lobe range
+    outside = offset > include_range
+    count = np.sum(outside, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if dB:
+            background = np.sum(np.where(outside, D_log, 0), axis=0) / count
+        else:
+            background = 20 * np.log10(np.abs(np.sum(np.where(outside, D, 0), axis=0) / count))
+
+    stats = np.empty(n, dtype=peak_dtype)
+    stats['peak_index'] = peak_index
+    stats['peak_value'] = peak_value
+    stats['sidelobe_index'] = sidelobe_index
+    stats['sidelobe_value'] = sidelobe_value
+    stats['background'] = background
+    stats['sidelobe_level'] = peak_value - sidelobe_value
+    stats['dynamic_range'] = peak_value - background
+
+    return stats
+
+
+def mirror_mean(file_path, chunk_size=64):
+    '''average every interferogram of a mirror recording over all
+    leading axes, e.g. [frames x lines x samples] -> [samples]
+
+    the .npy file is memory mapped and summed chunk_size rows at a
+    time, so the full volume is never loaded
+    '''
+    data = np.load(file_path, mmap_mode='r')
+    data = data.reshape(-1, data.shape[-1])
+
+    total = np.zeros(data.shape[-1], dtype=np.result_type(data.dtype, np.float64))
+    for i in range(0, data.shape[0], chunk_size):
+        total += np.sum(data[i:i + chunk_size], axis=0, dtype=total.dtype)
+
+    return total / data.shape[0]
+
+
+def fft_filtfilt(b, x, padlen=None):
+    '''zero-phase FIR filtering of a 1-D signal with the frequency
+    response |B|^2 applied in a single FFT pass
+
+    the signal is extended by odd reflection in the same way as
+    scipy.signal.filtfilt (padlen defaults to 3 * len(b)), so the
+    result matches filtfilt(b, 1, x) to floating point precision
+    '''
+    x = np.asarray(x)
+    ntaps = len(b)
+    if padlen is None:
+        padlen = 3 * ntaps
+    assert x.shape[0] > padlen, 'signal shorter than padlen'
+
+    # odd extension at both ends
+    left = 2 * x[0] - x[padlen:0:-1]
+    right = 2 * x[-1] - x[-2:-(padlen + 2):-1]
+    ext = np.concatenate((left, x, right))
+
+    from scipy.fft import next_fast_len
+    # zero padding to keep the two-sided kernel from wrapping
+    nfft = next_fast_len(ext.shape[0] + ntaps - 1)
+    if np.isrealobj(ext):
+        B = rfft(b, nfft)
+        y = irfft(rfft(ext, nfft) * (B * B.conj()).real, nfft)
+    else:
+        B = fft(b, nfft)
+        y = ifft(fft(ext, nfft) * (B * B.conj()).real, nfft)
+
+    return y[padlen:padlen + x.shape[0]]
+
+
+def crop_psf(A_line, half_width=165):
+    '''crop [2 * half_width] samples around the magnitude peak into
+    the [depth x 1] layout of the files in data/PSF
+    '''
+    peak = np.argmax(np.abs(A_line))
+    return A_line[int(peak - half_width):int(peak + half_width), np.newaxis]
+
+
+def measured_psf(sg, numtaps=401, cutoff=0.05, half_width=165):
+    '''obtain the measured PSF from the averaged mirror interferogram:
+    high-pass zero-phase filtering, IFFT, l2 normalisation and cropping
+    '''
+    from scipy.signal import firwin
+    b = firwin(numtaps, cutoff, pass_zero='highpass')
+    sg = fft_filtfilt(b, sg)
+
+    A_line = ifft(sg)
+    A_line = A_line / np.linalg.norm(A_line)
+    return crop_psf(A_line, half_width)
+
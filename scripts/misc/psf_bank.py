@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 3:30 p.m.
+# @Author  : young wang
+# @FileName: psf_bank.py
+# @Software: PyCharm
+
+import numpy as np
+import pickle
+from pathlib import Path
+from numpy.fft import fft
+from misc import processing, profiling
+
+# Module level constants
+PSF_NAMES = ('ear', 'finger', 'nail', 'onion', 'measured')
+
+
+def _standardise(P):
+    '''zero-mean, unit-norm power spectra along the last axis'''
+    P = P - np.mean(P, axis=-1, keepdims=True)
+    return P / np.linalg.norm(P, axis=-1, keepdims=True)
+
+
+class PSFBank:
+    '''a set of PSFs loaded once, with their power spectra kept for
+    selecting the PSF that best matches a frame or A-line block
+
+    a frame is scored against every PSF by the correlation between
+    its mean A-line power spectrum and the PSF power spectrum. For
+    sparse scatterers, E|S(f)|^2 is proportional to |D(f)|^2 plus a
+    flat noise floor, so one FFT of the frame and a [n_psf x depth]
+    matrix product score all PSFs
+
+    the spectra Df are only used for scoring. deconvolve passes the
+    selected PSF to make_sparse_representation, whose ConvBPDN solves
+    take the FFT of their (centred) PSF again; that is one 330 point
+    FFT per solve, about 30 us against seconds for the solve
+
+    parameters
+    ----------
+    names: PSF file names in D_PATH
+    D_PATH: folder holding the pickled [depth x 1] PSFs
+    '''
+
+    def __init__(self, names=PSF_NAMES, D_PATH='../data/PSF/'):
+        D = []
+        for name in names:
+            path = Path(D_PATH) / name
+            if not path.is_file():
+                raise Exception("PSF %s not found" % path)
+            with open(path, 'rb') as f:
+                D.append(pickle.load(f))
+                f.close()
+
+        self.set_psfs(names, D)
+
+    @classmethod
+    def from_arrays(cls, names, D):
+        '''build a bank from PSFs already in memory'''
+        bank = cls.__new__(cls)
+        bank.set_psfs(names, D)
+        return bank
+
+    def set_psfs(self, names, D):
+        self.names = list(names)
+        self.D = [np.reshape(d, (-1, 1)) for d in D]
+
+        depth = {d.shape[0] for d in self.D}
+        assert len(depth) == 1, 'PSFs of equal length'
+        self.depth = depth.pop()
+
+        # frequency domain PSFs and standardised power spectra
+        self.Df = fft(np.hstack(self.D), axis=0).T
+        self.power = _standardise(abs(self.Df) ** 2)
+
+    def __len__(self):
+        return len(self.D)
+
+    def __getitem__(self, index):
+        if isinstance(index, str):
+            index = self.names.index(index)
+        return self.D[index]
+
+    def score(self, s):
+        '''correlation of the mean power spectrum of the A-lines
+        s [depth x lines] with each PSF, shape [n_psf]
+        '''
+        assert s.shape[0] == self.depth, 'A-line length must match the PSF length'
+        S = np.mean(abs(fft(s, axis=0)) ** 2, axis=1)
+        return self.power @ _standardise(S)
+
+    def score_blocks(self, s, block_width):
+        '''scores of every block of block_width adjacent A-lines,
+        shape [n_psf x n_blocks], the last block may be narrower
+        '''
+        assert s.shape[0] == self.depth, 'A-line length must match the PSF length'
+        P = abs(fft(s, axis=0)) ** 2
+
+        starts = np.arange(0, s.shape[1], block_width)
+        P = np.add.reduceat(P, starts, axis=1) / np.diff(np.append(starts, s.shape[1]))
+        return self.power @ _standardise(P.T).T
+
+    def select(self, s):
+        '''index of the best matching PSF for the frame s'''
+        return int(np.argmax(self.score(s)))
+
+    def select_blocks(self, s, block_width):
+        '''index of the best matching PSF for every A-line block'''
+        return np.argmax(self.score_blocks(s, block_width), axis=0)
+
+    def deconvolve(self, s, lmbda, w_lmbda, speckle_weight, block_width=None, halo=processing.mask_halo,
+                   Ear=False):
+        '''sparse representation of s with the best matching PSF
+
+        with block_width set, the PSF is selected per A-line block and
+        each run of adjacent blocks sharing a PSF is solved separately,
+        with halo extra A-lines on either side so that the getWeight mask
+        sees its true neighbourhood at a PSF switch, as in
+        processing.make_tiled_sparse_representation. Only the run's own
+        lines are kept
+
+        returns x and the PSF index per A-line
+        '''
+        if block_width is None:
+            index = np.full(s.shape[1], self.select(s))
+        else:
+            index = np.repeat(self.select_blocks(s, block_width), block_width)[:s.shape[1]]
+
+        # split into runs of adjacent A-lines sharing a PSF
+        edges = np.flatnonzero(np.diff(index)) + 1
+        starts = np.concatenate(([0], edges))
+        stops = np.concatenate((edges, [s.shape[1]]))
+
+        x = np.empty(s.shape, dtype=np.result_type(s, np.complex128))
+        # the runs are solves of one frame
+        with profiling.frame():
+            for start, stop in zip(starts, stops):
+                pad_start, pad_stop = max(0, start - halo), min(stop + halo, s.shape[1])
+                x_run = processing.make_sparse_representation(s[:, pad_start:pad_stop], self.D[index[start]],
+                                                              lmbda, w_lmbda, speckle_weight, Ear=Ear)
+                x[:, start:stop] = x_run[:, start - pad_start:stop - pad_start]
+        return x, index
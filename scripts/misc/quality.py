@@ -5,12 +5,12 @@
 # @Software: PyCharm
 
 import numpy as np
-from skimage.filters import gaussian
-from scipy.ndimage import median_filter
-from misc.processing import imag2uint
+import weakref
+from misc.processing import imag2uint, log_uint8
 
 
 def gaussian_blur(noisy, sigma=0.5):
+    from skimage.filters import gaussian
     out = gaussian(noisy, sigma=sigma, output=None, mode='nearest', cval=0,
                    multichannel=None, preserve_range=False, truncate=4.0)
     return (out)
@@ -119,11 +119,166 @@ def Contrast(region_h, region_b):
     return 10*np.log10(contrast)
     # return contrast
 
+def moving_sum(a, n, axis=0):
+    '''sum of every n consecutive elements of a along axis, entry i
+    being a[i:i+n].sum(axis)
+
+    a is cut into blocks of n elements, each with its own prefix and
+    suffix sums, and a window is the suffix of one block plus the prefix
+    of the next. Nothing is subtracted, so the rounding error of a window
+    is relative to the values in the window, not to those of the whole
+    array as for a single cumulative sum
+    '''
+    a = np.moveaxis(np.asarray(a), axis, 0)
+    L = a.shape[0]
+    m = -(-L // n) * n
+    blocks = np.zeros((m // n, n) + a.shape[1:], dtype=np.result_type(a, np.float64))
+    blocks.reshape((m,) + a.shape[1:])[:L] = a
+
+    prefix = np.cumsum(blocks, axis=1).reshape((m,) + a.shape[1:])
+    suffix = np.flip(np.cumsum(np.flip(blocks, axis=1), axis=1), axis=1).reshape((m,) + a.shape[1:])
+
+    out = suffix[:L - n + 1].copy()
+    # a window that starts inside a block ends inside the next one
+    inside = np.arange(L - n + 1) % n != 0
+    out[inside] += prefix[n - 1:L][inside]
+    return np.moveaxis(out, 0, axis)
+
+def window_sum(s, width, height):
+    '''sum of every height x width window of s, indexed as [y, x] in
+    the same way as ROI(x, y, width, height, s)
+    '''
+    return moving_sum(moving_sum(s, height, axis=0), width, axis=1)
+
+def local_stats(s, width, height):
+    '''compute the local mean and standard deviation of every
+    height x width window position of s with O(1) work per window
+
+    parameters
+    ----------
+    s: array_like
+    intensity image with the standard dimension [330x512]
+    width refers the window increment in the lateral direction > 0
+    height refers the window increment in the axial direction > 0
+
+    returns mean and std maps of shape
+    [s.shape[0] - height + 1, s.shape[1] - width + 1], where entry
+    [y, x] matches np.mean/np.std of ROI(x, y, width, height, s)
+    '''
+    assert 0 < height <= s.shape[0] and 0 < width <= s.shape[1], \
+        'window size'
+
+    s = np.asarray(s, dtype=np.float64)
+    n = width * height
+
+    # the window sums only hold the window's own pixels, so dark windows
+    # keep their precision next to regions many decades brighter
+    mean = window_sum(s, width, height) / n
+    var = window_sum(s * s, width, height) / n - mean ** 2
+
+    std = np.sqrt(np.maximum(var, 0))
+
+    return mean, std
+
+def SNR_map(s, width, height, roi_b=None):
+    '''compute SNR for every height x width window position of s
+
+    SNR = 10*log10(uh/σb)
+
+    parameters
+    ----------
+    s: array_like
+    intensity image
+
+    roi_b: array_like
+    background region, if None the standard deviation of
+    each window itself is used, i.e. the local speckle SNR
+    '''
+    mean_h, std_h = local_stats(s, width, height)
+    std_b = std_h if roi_b is None else np.std(roi_b)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        snr = 10 * np.log10(mean_h / std_b)
+
+    return snr
+
+def CNR_map(s, width, height, roi_a):
+    '''compute CNR between every height x width window position
+    of s and a region free of structure
+
+    CNR = 10*log((|uh-ub|/σb)
+
+    parameters
+    ----------
+    s: array_like
+    intensity image
+    roi_a: array_like
+    region free of structure
+    '''
+    mean_h, _ = local_stats(s, width, height)
+
+    a_mean = np.mean(roi_a)
+    a_std = np.std(roi_a)
+
+    with np.errstate(divide='ignore'):
+        cnr = 10 * np.log10(abs(mean_h - a_mean) / a_std)
+
+    return cnr
+
+def Contrast_map(s, width, height, region_b):
+    '''compute the contrast between every height x width window
+    position of s and a background region
+    '''
+    mean_h, _ = local_stats(s, width, height)
+    b_mean = np.mean(region_b)
+
+    with np.errstate(divide='ignore'):
+        contrast = 10 * np.log10(mean_h / b_mean)
+
+    return contrast
+
+# median filtered images keyed by (id(image), size)
+_median_cache = {}
+
+def median_image(s, size=(3, 3)):
+    '''median filter the full image once and cache the result per
+    image identity, so that every ROI drawn from the same image
+    reuses a single filter pass
+
+    the cache holds a weak reference to s and is only valid as
+    long as s is not modified in place
+    '''
+    key = (id(s), tuple(size))
+    entry = _median_cache.get(key)
+    if entry is not None and entry[0]() is s:
+        return entry[1]
+
+    # drop entries whose images have been garbage collected
+    for k in [k for k, v in _median_cache.items() if v[0]() is None]:
+        del _median_cache[k]
+
+    from scipy.ndimage import median_filter
+    s_median = median_filter(s, size=size)
+    _median_cache[key] = (weakref.ref(s), s_median)
+    return s_median
+
+def median_gCNR(s, roi_h, roi_b, size=(3, 3)):
+    '''compute gCNR between two ROIs of the median filtered
+    full image, where roi_h and roi_b are [x, y, width, height]
+
+    unlike log_gCNR(..., improvement=True), the median filter
+    is applied once to the whole image rather than to each region,
+    so pixels at the ROI edges are filtered with their true neighbours
+    '''
+    s_median = median_image(s, size=size)
+    return log_gCNR(ROI(*roi_h, s_median), ROI(*roi_b, s_median))
+
 def log_gCNR(region_h, region_b, improvement = False):
     assert np.size(region_h) == np.size(region_b), \
         'size of image patch'
 
     if improvement == True:
+        from scipy.ndimage import median_filter
         region_h = median_filter(region_h,size=(3,3))
         region_b = median_filter(region_b,size=(3,3))
     else:
@@ -159,5 +314,66 @@ def log_gCNR(region_h, region_b, improvement = False):
 
     return 1 - ovl
 
-    
+def log_hist(region, rvmin=5, vmax=55):
+    '''count the pixels of an intensity region in the 256 bins of
+    its 8-bit log image, the same bins log_gCNR builds its
+    histograms on
+    '''
+    log_region = log_uint8(np.ravel(region), rvmin, vmax, intensity=True)
+    return np.bincount(log_region, minlength=256)
+
+class GCNRAccumulator:
+    '''accumulate the log intensity histograms of a homogeneous
+    (tissue) class and a background class frame by frame and report
+    their running gCNR
+
+    regions may have any size, as each histogram is normalised by
+    its own pixel count. Accumulators filled by parallel workers are
+    combined with merge
+
+    parameters
+    ----------
+    rvmin, vmax: display range in dB used to quantise log intensity
+    '''
+
+    N = 256
 
+    def __init__(self, rvmin=5, vmax=55):
+        self.rvmin = rvmin
+        self.vmax = vmax
+        self.h_hist = np.zeros(self.N, dtype=np.int64)
+        self.b_hist = np.zeros(self.N, dtype=np.int64)
+
+    def update(self, region_h=None, region_b=None):
+        '''add the pixels of a homogeneous and/or background
+        intensity region from the current frame
+        '''
+        if region_h is not None and np.size(region_h) > 0:
+            self.h_hist += log_hist(region_h, self.rvmin, self.vmax)
+        if region_b is not None and np.size(region_b) > 0:
+            self.b_hist += log_hist(region_b, self.rvmin, self.vmax)
+        return self
+
+    def merge(self, other):
+        '''fold in the partial histograms of another accumulator'''
+        assert (self.rvmin, self.vmax) == (other.rvmin, other.vmax), \
+            'display range of accumulators'
+
+        self.h_hist += other.h_hist
+        self.b_hist += other.b_hist
+        return self
+
+    def reset(self):
+        self.h_hist[:] = 0
+        self.b_hist[:] = 0
+
+    def gCNR(self):
+        '''gCNR = 1 - OVL of the two normalised histograms, nan
+        until both classes have received pixels
+        '''
+        n_h, n_b = self.h_hist.sum(), self.b_hist.sum()
+        if n_h == 0 or n_b == 0:
+            return np.nan
+
+        ovl = np.minimum(self.h_hist / n_h, self.b_hist / n_b).sum()
+        return 1 - ovl
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-20 1:15 p.m.
+# @Author  : young wang
+# @FileName: shm.py
+# @Software: PyCharm
+
+import numpy as np
+from collections import deque
+from multiprocessing import Pool, shared_memory
+from misc import processing, profiling
+
+
+class SharedRing:
+    '''n_slots arrays of one shape and dtype in a single block of shared
+    memory, as array[slot]
+
+    the process that creates the ring owns the block and unlinks it on
+    close, other processes attach to it by its handle
+
+    parameters
+    ----------
+    n_slots: number of arrays
+    shape: shape of one array
+    name: name of an existing block to attach to, None to create one
+    '''
+
+    def __init__(self, n_slots, shape, dtype=complex, name=None):
+        self.n_slots = n_slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        size = n_slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=max(size, 1))
+        self.array = np.ndarray((n_slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def handle(self):
+        '''picklable (n_slots, shape, dtype, name) to attach with SharedRing(*handle)'''
+        return self.n_slots, self.shape, self.dtype.str, self.shm.name
+
+    def __getitem__(self, slot):
+        return self.array[slot]
+
+    def __setitem__(self, slot, value):
+        self.array[slot] = value
+
+    def close(self):
+        # the array must go before the buffer it views
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# rings and solver arguments of a pipeline worker process
+_worker = {}
+
+
+def _attach(handles, args, log):
+    '''Pool initializer, attach once to the rings of the pipeline'''
+    _worker['rings'] = {key: SharedRing(*handle) for key, handle in handles.items()}
+    _worker['args'] = args
+    _worker['log'] = log
+
+
+def _solve_slot(slot):
+    '''deconvolve the frame in slot and write the sparse estimate (and
+    mask) to the same slot of the result rings, executed in a worker
+    process. Returns the slot and the frame's SolverLog, if the parent
+    logs solves
+    '''
+    if _worker['log']:
+        return profiling.logged(_solve, slot)
+    return _solve(slot), None
+
+
+def _solve(slot):
+    rings = _worker['rings']
+    D, lmbda, w_lmbda, speckle_weight, Ear, tile_width = _worker['args']
+    s = rings['frames'][slot]
+
+    if tile_width:
+        rings['results'][slot] = processing.make_tiled_sparse_representation(
+            s, D, lmbda, w_lmbda, speckle_weight, tile_width=tile_width, Ear=Ear)
+    elif 'masks' in rings:
+        rings['results'][slot], rings['masks'][slot] = processing.make_sparse_representation(
+            s, D, lmbda, w_lmbda, speckle_weight, Mask=True, Ear=Ear)
+    else:
+        rings['results'][slot] = processing.make_sparse_representation(s, D, lmbda, w_lmbda,
+                                                                       speckle_weight, Ear=Ear)
+    return slot
+
+
+class FramePipeline:
+    '''make_sparse_representation of a stream of equally sized frames in
+    a process pool
+
+    frames, sparse estimates and masks are exchanged through SharedRings
+    of n_slots frames, so only a slot index is pickled per frame. The PSF
+    and the solver parameters are sent once, when the workers start
+
+    with FramePipeline(D, 0.05, 0.05, 0.1, shape=(330, 512), processes=4) as pipeline:
+        for x in pipeline.map(frames):
+            ...
+
+    parameters
+    ----------
+    shape: [depth x width] of every frame
+    processes: worker processes
+    n_slots: frames in flight, default 2 * processes so that every worker
+    has its next frame waiting
+    Mask: map also yields the mask of getWeight, as make_sparse_representation(..., Mask=True)
+    tile_width: solve every frame with make_tiled_sparse_representation (no masks)
+
+    while a SolverLog is active when the pipeline starts, the workers
+    log their solves and every frame's log is merged into it
+    '''
+
+    def __init__(self, D, lmbda, w_lmbda, speckle_weight, shape, processes=2, n_slots=None,
+                 Mask=False, Ear=False, tile_width=0):
+        assert not (Mask and tile_width), 'masks of tiled solves'
+        self.n_slots = n_slots or 2 * processes
+        self.rings = {'frames': SharedRing(self.n_slots, shape, complex),
+                      'results': SharedRing(self.n_slots, shape, complex)}
+        if Mask:
+            self.rings['masks'] = SharedRing(self.n_slots, shape, float)
+
+        handles = {key: ring.handle for key, ring in self.rings.items()}
+        args = (D, lmbda, w_lmbda, speckle_weight, Ear, tile_width)
+        self.pool = Pool(processes, initializer=_attach, initargs=(handles, args, profiling.is_logging()))
+
+    def map(self, frames):
+        '''yield the sparse estimate x, or (x, W_mask) with Mask, of
+        every frame in order. The frames are copied into free slots while
+        earlier frames are being solved
+        '''
+        frames = iter(frames)
+        free = deque(range(self.n_slots))
+        pending = deque()
+        while True:
+            while free:
+                s = next(frames, None)
+                if s is None:
+                    break
+                slot = free.popleft()
+                self.rings['frames'][slot] = s
+                pending.append(self.pool.apply_async(_solve_slot, (slot,)))
+            if not pending:
+                return
+
+            slot, log = pending.popleft().get()
+            with profiling.frame():
+                profiling.merge(log)
+            x = self.rings['results'][slot].copy()
+            if 'masks' in self.rings:
+                yield x, self.rings['masks'][slot].copy()
+            else:
+                yield x
+            free.append(slot)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        for ring in self.rings.values():
+            ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if args[0] is not None:
+            self.pool.terminate()
+        self.close()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 5:30 p.m.
+# @Author  : young wang
+# @FileName: streaming.py
+# @Software: PyCharm
+
+import numpy as np
+from misc import processing
+
+
+class LineStream:
+    '''line-by-line sparse deconvolution of an A-line stream
+
+    A-lines are pushed one at a time and kept in a rolling window.
+    Every block new lines, the window is deconvolved with
+    make_sparse_representation and the block is emitted. The window
+    keeps halo lines of context on either side of the block, so the
+    2-D mask of getWeight sees the same neighbourhood as in a full
+    frame, and a line is emitted at most block + halo lines after it
+    arrives
+
+    parameters
+    ----------
+    D: PSF [depth x 1]
+    lmbda: sparsity regularization parameter
+    w_lmbda: sparsity regularization parameter of the mask pass
+    speckle_weight: L1 weight in speckle regions
+    block: lines emitted per deconvolution
+    halo: lines of context on either side of a block
+    background: [depth] background A-line subtracted from every line,
+    e.g. the frame mean of a previous frame
+    '''
+
+    def __init__(self, D, lmbda, w_lmbda, speckle_weight, block=32,
+                 halo=processing.mask_halo, background=None, Ear=False):
+        self.D = D
+        self.lmbda = lmbda
+        self.w_lmbda = w_lmbda
+        self.speckle_weight = speckle_weight
+        self.block = block
+        self.halo = halo
+        self.background = background
+        self.Ear = Ear
+
+        self.depth = D.shape[0]
+        self.window = np.zeros((self.depth, halo + block + halo), dtype=complex)
+        self.reset()
+
+    def reset(self):
+        '''start a new stream, e.g. a new frame'''
+        # lines held in the window, the first start of them already emitted
+        self.n_lines = 0
+        self.start = 0
+        self.n_in = 0
+        self.n_out = 0
+
+    @property
+    def latency(self):
+        '''maximum delay in lines between a push and its emission'''
+        return self.block + self.halo
+
+    def push(self, A_line):
+        '''add one A-line [depth], returns the deconvolved lines that
+        are ready as [depth x k], k = 0 or block
+        '''
+        A_line = np.ravel(A_line)
+        assert A_line.shape[0] == self.depth, 'A-line length must match the PSF length'
+
+        if self.background is not None:
+            A_line = A_line - self.background
+
+        self.window[:, self.n_lines] = A_line
+        self.n_lines += 1
+        self.n_in += 1
+
+        if self.n_lines - self.start == self.block + self.halo:
+            return self._emit(self.block)
+        return np.empty((self.depth, 0), dtype=complex)
+
+    def flush(self):
+        '''deconvolve and return the lines still pending at the end of
+        the stream, with the right edge treated as a frame edge
+        '''
+        n = self.n_lines - self.start
+        if n == 0:
+            return np.empty((self.depth, 0), dtype=complex)
+        return self._emit(n)
+
+    def _emit(self, n):
+        x = processing.make_sparse_representation(self.window[:, :self.n_lines], self.D, self.lmbda,
+                                                  self.w_lmbda, self.speckle_weight, Ear=self.Ear)
+        out = x[:, self.start:self.start + n]
+
+        # keep halo lines of left context for the next block
+        keep = min(self.halo, self.start + n)
+        first = self.start + n - keep
+        self.window[:, :self.n_lines - first] = self.window[:, first:self.n_lines]
+        self.n_lines -= first
+        self.start = keep
+        self.n_out += n
+        return out
+
+    def run(self, A_lines):
+        '''generator over an iterable of A-lines, yields the deconvolved
+        lines one at a time in arrival order
+        '''
+        for A_line in A_lines:
+            for line in self.push(A_line).T:
+                yield line
+        for line in self.flush().T:
+            yield line
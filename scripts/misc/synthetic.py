@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 11:10 p.m.
+# @Author  : young wang
+# @FileName: synthetic.py
+# @Software: PyCharm
+
+import numpy as np
+import pickle
+from pathlib import Path
+from numpy.fft import fft, ifft
+
+# Module level constants
+depth = 330
+n_samples = 1460
+crop = (-350, -20)  # A-line bins of the raw sweep, as in processing.Aline_R
+
+
+def load_psf(name, D_PATH='../data/PSF/'):
+    '''PSF [depth x 1] from the pickled PSF folder'''
+    path = Path(D_PATH) / name
+    if not path.is_file():
+        raise Exception("PSF %s not found" % path)
+    with open(path, 'rb') as f:
+        D = pickle.load(f)
+        f.close()
+    return D
+
+
+def centred_psf_fft(D, n=depth):
+    '''FFT of the PSF circularly shifted so its magnitude peak is at
+    index 0, so a blurred scatterer stays at its own depth
+    '''
+    D = np.ravel(D)
+    return fft(np.roll(D, -int(np.argmax(abs(D)))), n=n)
+
+
+def scatterers(shape, density=0.02, amplitude=100, rng=None):
+    '''sparse complex field: a fraction density of the pixels hold a
+    point scatterer of normal amplitude and uniform phase
+    '''
+    rng = np.random.default_rng(rng)
+    x = np.zeros(shape, dtype=complex)
+    mask = rng.random(shape) < density
+    x[mask] = amplitude * rng.standard_normal(mask.sum()) * np.exp(2j * np.pi * rng.random(mask.sum()))
+    return x
+
+
+def speckle(shape, rows, level=5, rng=None):
+    '''circular complex Gaussian speckle of std level between rows
+    (start, stop) along the depth axis 0, zero elsewhere
+    '''
+    rng = np.random.default_rng(rng)
+    x = np.zeros(shape, dtype=complex)
+    n = (rows[1] - rows[0],) + tuple(shape[1:])
+    x[rows[0]:rows[1]] = level * (rng.standard_normal(n) + 1j * rng.standard_normal(n)) / np.sqrt(2)
+    return x
+
+
+def frame(D, width=512, density=0.02, amplitude=100, speckle_rows=(100, 200), speckle_level=5,
+          noise=0.5, seed=None):
+    '''a [depth x width] frame of A-lines s = D * x + noise along depth
+
+    returns s and the ground truth x (scatterers plus speckle), each
+    at the depth of the PSF magnitude peak of its echo
+    '''
+    rng = np.random.default_rng(seed)
+    shape = (np.shape(D)[0], width)
+    x = scatterers(shape, density, amplitude, rng) + speckle(shape, speckle_rows, speckle_level, rng)
+
+    s = ifft(fft(x, axis=0) * centred_psf_fft(D, shape[0])[:, np.newaxis], axis=0)
+    s += noise * (rng.standard_normal(shape) + 1j * rng.standard_normal(shape)) / np.sqrt(2)
+    return s, x
+
+
+def raw(D, n_lines=25000, density=0.02, amplitude=100, speckle_rows=(100, 200), speckle_level=5,
+        noise=1.0, seed=None, dtype=np.float64):
+    '''real interferograms [n_lines x n_samples] whose A-lines
+    ifft(raw, axis=1)[:, -350:-20] are D * x plus noise
+
+    returns raw and the ground truth x [n_lines x depth]
+    '''
+    rng = np.random.default_rng(seed)
+    shape = (n_lines, np.shape(D)[0])
+    x = scatterers(shape, density, amplitude, rng)
+    x += speckle(shape[::-1], speckle_rows, speckle_level, rng).T
+
+    spectrum = np.zeros((n_lines, n_samples), dtype=complex)
+    spectrum[:, crop[0]:crop[1]] = ifft(fft(x, axis=1) * centred_psf_fft(D, shape[1]), axis=1)
+
+    # the real part keeps half of the one sided spectrum
+    interferogram = 2 * np.real(fft(spectrum, axis=1)) + noise * rng.standard_normal((n_lines, n_samples))
+    return interferogram.astype(dtype), x
+
+
+def raw_chunks(D, n_lines, chunk_size=4096, seed=None, **kwargs):
+    '''raw interferograms of any line count, generated chunk_size lines
+    at a time, yields (raw, x) per chunk
+    '''
+    seeds = np.random.SeedSequence(seed).spawn(-(-n_lines // chunk_size))
+    for i, seed_seq in enumerate(seeds):
+        n = min(chunk_size, n_lines - i * chunk_size)
+        yield raw(D, n, seed=seed_seq, **kwargs)
+
+
+def write_raw(file_path, D, n_lines, chunk_size=4096, seed=None, dtype=np.float32, **kwargs):
+    '''write raw interferograms [n_lines x n_samples] to an .npy file
+    chunk by chunk, so the volume never has to fit in memory, returns
+    the memory mapped array
+    '''
+    out = np.lib.format.open_memmap(file_path, mode='w+', dtype=dtype, shape=(n_lines, n_samples))
+    line = 0
+    for chunk, _ in raw_chunks(D, n_lines, chunk_size, seed, dtype=dtype, **kwargs):
+        out[line:line + chunk.shape[0]] = chunk
+        line += chunk.shape[0]
+    out.flush()
+    return out
+
+
+def relative_error(x_est, x, max_shift=2):
+    '''||a x_est - x|| / ||x|| for the complex gain a that fits x_est to
+    the ground truth x best, as l2 normalisation and weighting change
+    the scale of a sparse estimate. x_est may also be offset along depth
+    by up to max_shift pixels (make_sparse_representation aligns by the
+    argmax of the complex PSF, not of its magnitude), the best circular
+    shift is used
+    '''
+    errors = []
+    for shift in range(-max_shift, max_shift + 1):
+        x_shift = np.ravel(np.roll(x_est, shift, axis=0))
+        a = np.vdot(x_shift, np.ravel(x)) / np.vdot(x_shift, x_shift)
+        errors.append(np.linalg.norm(a * x_shift - np.ravel(x)) / np.linalg.norm(x))
+    return float(min(errors))
@@ -20,59 +20,13 @@ from misc import processing,quality,annotation
 
 # Module level constants
 eps = 1e-14
+rc_params = {'font.size': 16, 'text.usetex': False, 'font.family': 'sans-serif', 'mathtext.fontset': 'stix'}
 
-if __name__ == '__main__':
-
-    plt.close('all')
-    # Customize matplotlib params
-    matplotlib.rcParams.update(
-        {
-            'font.size': 16,
-            'text.usetex': False,
-            'font.family': 'sans-serif',
-            'mathtext.fontset': 'stix',
-        }
-    )
-    file_name = ['ear']
-    # Load the example dataset
-    s, D = processing.load_data(file_name[0], decimation_factor=20)
-
-    rvmin, vmax = 5, 55 #dB
-
-
-    s_log = 20 * np.log10(abs(s))
-
-    # l2 norm data and save the scaling factor
-    _, snorm = processing.to_l2_normed(s)
-
-    opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
-                                      'MaxMainIter': 20, 'RelStopTol': 5e-5, 'AuxVarObj': True,
-                                      'RelaxParam': 1.515, 'AutoRho': {'Enabled': True}})
-
-    # Weigth factor to apply to the fidelity (l2) term in the cost function
-    # in regions segmented as containing speckle
-    # speckle_weight = np.linspace(0.1,1,5)
-    speckle_weight = [0.001,0.05, 0.1, 0.5,1]
-    lmbda = 0.05
-    w_lmbda = 0.05
-
-    index = 400 # index A-line
-    s_line = abs(snorm[:,index])
-
-    x_line = np.zeros((snorm.shape[0], len(speckle_weight)))
-    sparse = np.zeros((snorm.shape[0], snorm.shape[1], len(speckle_weight)))
-    sparsity = np.zeros(len(speckle_weight))
-
-    #update opt to include W
-
-    for i in range(len(speckle_weight)):
-
-        x, line = processing.make_sparse_representation(s, D, lmbda,w_lmbda, speckle_weight[i],Line=True,
-                                                        index = index , Ear=True)
-        x_log = 20 * np.log10(abs(x))
-        sparse[:,:,i] = x_log
-        x_line[:, i] = line
 
+def plot(s_log, sparse, s_line, x_line, lmbda, speckle_weight, index, rvmin, vmax):
+    '''the figure of the reference (s_log) and, per value of
+    speckle_weight, the sparse vector image (sparse[:, :, i]), its
+    homogeneous region and its A-line index (x_line[:, i])'''
     width, height = (115, 95)
     homogeneous = [[125, 120, width, height]]
 
@@ -166,6 +120,55 @@ if __name__ == '__main__':
         ax.set_ylim(0, np.max(s_line)*1.1)
 
         ax.set_xlabel('axial depth [pixels]')
+    return fig
+
+
+if __name__ == '__main__':
+
+    plt.close('all')
+    # Customize matplotlib params
+    matplotlib.rcParams.update(rc_params)
+    file_name = ['ear']
+    # Load the example dataset
+    s, D = processing.load_data(file_name[0], decimation_factor=20)
+
+    rvmin, vmax = 5, 55 #dB
+
+
+    s_log = 20 * np.log10(abs(s))
+
+    # l2 norm data and save the scaling factor
+    _, snorm = processing.to_l2_normed(s)
+
+    opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                      'MaxMainIter': 20, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                      'RelaxParam': 1.515, 'AutoRho': {'Enabled': True}})
+
+    # Weigth factor to apply to the fidelity (l2) term in the cost function
+    # in regions segmented as containing speckle
+    # speckle_weight = np.linspace(0.1,1,5)
+    speckle_weight = [0.001,0.05, 0.1, 0.5,1]
+    lmbda = 0.05
+    w_lmbda = 0.05
+
+    index = 400 # index A-line
+    s_line = abs(snorm[:,index])
+
+    x_line = np.zeros((snorm.shape[0], len(speckle_weight)))
+    sparse = np.zeros((snorm.shape[0], snorm.shape[1], len(speckle_weight)))
+    sparsity = np.zeros(len(speckle_weight))
+
+    #update opt to include W
+
+    for i in range(len(speckle_weight)):
+
+        x, line = processing.make_sparse_representation(s, D, lmbda,w_lmbda, speckle_weight[i],Line=True,
+                                                        index = index , Ear=True)
+        x_log = 20 * np.log10(abs(x))
+        sparse[:,:,i] = x_log
+        x_line[:, i] = line
+
+    fig = plot(s_log, sparse, s_line, x_line, lmbda, speckle_weight, index, rvmin, vmax)
     plt.show()
 
     fig.savefig('../Images/omega_compare.jpeg',
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 2:25 p.m.
+# @Author  : young wang
+# @FileName: online_cdl.py
+# @Software: PyCharm
+
+"""this script estimates the axial PSF with online (minibatch)
+convolutional dictionary learning, streaming A-lines from disk,
+and compares wall time and final cost against the batch DictLearn
+run of oct_cdl.py"""
+
+import numpy as np
+import pickle
+import time
+from pathlib import Path
+from tabulate import tabulate
+from misc import processing, learning
+
+# Module level constants
+lmbda = 1e-1
+
+if __name__ == '__main__':
+
+    file_name = 'nail'
+    decimation_factor = 20
+    batch_size = 64
+    time_budget = 60  # seconds
+
+    # the pickled datasets can not be memory mapped, keep an .npy copy
+    S_PATH = '../data/' + file_name
+    NPY_PATH = S_PATH + '.npy'
+    if not Path(NPY_PATH).is_file():
+        with open(S_PATH, 'rb') as f:
+            np.save(NPY_PATH, pickle.load(f))
+            f.close()
+
+    s = processing.load_data(file_name, decimation_factor=decimation_factor, data_only=True)
+    _, snorm = processing.to_l2_normed(s)
+    dic_index = int(6500 / decimation_factor)
+
+    # batch DictLearn over a random 25% of the A-lines held in memory
+    t = time.perf_counter()
+    D_batch, _ = learning.batch_psf(s, lmbda, dic_index=dic_index, Maxiter=1000)
+    batch_time = time.perf_counter() - t
+
+    # online learning from the same initial A-line, streamed from disk
+    learner = learning.OnlinePSFLearner(snorm[:, dic_index], lmbda)
+    batches = learning.npy_batches(NPY_PATH, batch_size, decimation_factor, epochs=10, seed=0)
+
+    t = time.perf_counter()
+    D_online = learning.align_psf(learner.solve(batches, time_budget=time_budget, tol=1e-3))
+    online_time = time.perf_counter() - t
+
+    table = [['batch DictLearn', batch_time, learning.psf_cost(D_batch, s, lmbda)],
+             ['online (%d batches)' % learner.n_batches, online_time, learning.psf_cost(D_online, s, lmbda)]]
+
+    print(tabulate(table, headers=['method', 'wall time [s]', 'final cost'],
+                   tablefmt='fancy_grid', floatfmt='.2f', numalign='right'))
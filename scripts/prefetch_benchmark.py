@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-20 11:30 a.m.
+# @Author  : young wang
+# @FileName: prefetch_benchmark.py
+# @Software: PyCharm
+
+"""this script deconvolves consecutive frames of a synthetic raw
+recording (.npy) once loading each frame in turn (read, IFFT, crop,
+mean removal) and once with misc.prefetch loading the next frames in a
+background thread while the current frame is solved"""
+
+import os
+import time
+import numpy as np
+from pathlib import Path
+from tabulate import tabulate
+from misc import processing, prefetch, synthetic
+
+# Module level constants
+n_lines = 25000
+decimation_factor = 20
+starts = range(0, 800, 100)
+depths = [1, 2, 4]
+n_runs = 3
+lmbda, w_lmbda, speckle_weight = 0.05, 0.05, 0.1
+
+
+def solve(s, D):
+    return processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight)
+
+
+def serial(file_path, D):
+    '''load and solve the frames in turn, returns the load time'''
+    raw = prefetch.open_raw(str(file_path))
+    load = 0
+    for start in starts:
+        t_load = time.perf_counter()
+        s = prefetch.raw_frame(raw, start, decimation_factor)
+        load += time.perf_counter() - t_load
+        solve(s, D)
+    return load
+
+
+def prefetched(file_path, D, depth):
+    with prefetch.raw_frames(str(file_path), starts, decimation_factor, depth=depth) as frames:
+        for s in frames:
+            solve(s, D)
+
+
+if __name__ == '__main__':
+
+    np.seterr(divide='ignore')
+    D = synthetic.load_psf('finger')
+    file_path = Path('../data/cache/prefetch_raw.npy')
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    synthetic.write_raw(str(file_path), D, n_lines, seed=0)
+
+    # the loaders take turns in every run, so a slow spell of the
+    # machine affects all of them
+    names = ['serial'] + ['prefetch, depth %d' % depth for depth in depths]
+    totals = {name: [] for name in names}
+    load = []
+    for run in range(n_runs):
+        t = time.perf_counter()
+        load.append(serial(file_path, D))
+        totals['serial'].append(time.perf_counter() - t)
+        for name, depth in zip(names[1:], depths):
+            t = time.perf_counter()
+            prefetched(file_path, D, depth)
+            totals[name].append(time.perf_counter() - t)
+
+    table = [[name] + totals[name] + [np.median(totals[name]), np.median(load) if name == 'serial' else None]
+             for name in names]
+    headers = ['loader'] + ['run %d [s]' % (run + 1) for run in range(n_runs)] + ['median [s]', 'load [s]']
+    print(tabulate(table, headers=headers,
+                   tablefmt='fancy_grid', floatfmt='.2f', numalign='right', missingval='-'))
+    print('%d frames per run, %d cores' % (len(starts), os.cpu_count()))
+    file_path.unlink()
@@ -4,92 +4,19 @@
 # @FileName: psf_v2.py
 # @Software: PyCharm
 
-import numpy as np
-from scipy.signal import find_peaks
 import matplotlib
 from matplotlib import pyplot as plt
 import pickle
 import os
 import time
-from numpy import linalg as LA
-from numpy.fft import fft, ifft
-from scipy.signal import hilbert, firwin, filtfilt
-
-def find_variable_name(variable):
-    for name, value in globals().items():
-        if value is variable:
-            return name
-
+from misc import psf
 
 def locatepeaks(D, mask_size=10, include_range=15, dB=True):
-    name = find_variable_name(D)
-
-    D = np.ravel(D)
-    print(name)
-    D_log = 20 * np.log10(abs(D))
-    D_log = D_log - np.min(D_log)
-
-    # use find_peaks to get the indices of the peaks
-
-    indices, _ = find_peaks(D_log, height=np.median(D_log))
-
-    # use find_peaks to get the indices of the peaks
-    # get the highest peak index and value
-    highest_peak_index = indices[np.argmax(D_log[indices])]
-    highest_peak_value = D_log[highest_peak_index]
-    print("Highest peak is at index", highest_peak_index, \
-          "with value", highest_peak_value)
-
-    # create a mask for peaks within x samples of the highest peak
-    mask = (indices >= highest_peak_index - mask_size) & (indices <= highest_peak_index + mask_size)
-    # get the peaks within 20 samples of the highest peak
-    nearby_peaks_indices = indices[mask]
-    nearby_peaks_values = D_log[nearby_peaks_indices]
-
-    # sort the nearby peaks by value, in descending order
-    nearby_sorted_indices = nearby_peaks_indices[np.argsort(-nearby_peaks_values)]
-
-    # find the second highest peak that is different from the highest peak
-    for index in nearby_sorted_indices:
-        if D_log[index] < highest_peak_value:
-            second_highest_peak_index = index
-            second_highest_peak_value = D_log[index]
-            break
-    print("Second highest peak within {} samples is at index "
-          "{} with value {}".format(mask_size,
-                                    second_highest_peak_index,
-                                    second_highest_peak_value))
-
-    # create a mask that excludes the range around the peak
-    mask = np.ones(D_log.shape, dtype=bool)
-
-    if dB:
-        # (1) average on dB scale
-        mask[
-        max(0, highest_peak_index - include_range): min(len(D_log), highest_peak_index + include_range + 1)] = False
-
-        # (1) create a new array excluding the range around the main peak
-        arr_excluding_range = D_log[mask]
-
-        # calculate the average of the new array
-        avg_excluding_range = np.mean(arr_excluding_range)
-    else:
-        mask[
-        max(0, highest_peak_index - include_range): min(len(D_log), highest_peak_index + include_range + 1)] = False
-
-        # (1) create a new array excluding the range around the main peak
-        arr_excluding_range = D[mask]
-
-        # calculate the average of the new array
-        avg_excluding_range = 20 * np.log10(abs(np.mean(arr_excluding_range)))
-
-    #
-    print(f"The average value excluding the main peak is {avg_excluding_range}")
-    print(f"The dynamic range: PSF-background {highest_peak_value - avg_excluding_range}")
+    stats = psf.locate_peaks(D, mask_size, include_range, dB=dB, height='median')[0]
 
-    return D_log, highest_peak_index, \
-           highest_peak_value, second_highest_peak_index, \
-           second_highest_peak_value, avg_excluding_range
+    return psf.log_psf(D).squeeze(), stats['peak_index'], \
+           stats['peak_value'], stats['sidelobe_index'], \
+           stats['sidelobe_value'], stats['background']
 
 if __name__ == '__main__':
     rvmin, vmax = 5, 55  # dB
@@ -107,17 +34,9 @@ if __name__ == '__main__':
         }
     )
 
-    with open('../data/mirror_clean.npy', 'rb') as f:
-        clean = np.load(f)
-
-    sg = np.mean(np.mean(clean[:, :, :], axis=0), axis=0)
-    b = firwin(401, 0.05, pass_zero='highpass')
-    sg = filtfilt(b, 1, sg)
-
-    temp_aline = ifft(sg) / LA.norm(ifft(sg))
-    peak_aline = np.argmax(np.abs(temp_aline))
-    A_line = temp_aline[int(peak_aline-165):int(peak_aline+165)]
-    D0 = A_line[:,np.newaxis]
+    # stream the mirror volume instead of loading it
+    sg = psf.mirror_mean('../data/mirror_clean.npy')
+    D0 = psf.measured_psf(sg, numtaps=401, cutoff=0.05, half_width=165)
 
     file_name = ['nail']
     D_PATH = '../Data/PSF/' + file_name[0]
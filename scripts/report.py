@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 8:30 p.m.
+# @Author  : young wang
+# @FileName: report.py
+# @Software: PyCharm
+
+"""this script renders the paper figures headless in one batch.
+Every reconstruction the figures need is solved once, in parallel
+worker processes, and kept in an .npz cache shared by all figure
+builders (and by later runs). The figures are then rendered with the
+Agg backend in parallel worker processes, and the time spent solving
+and rendering is reported per task
+
+the figures are drawn by the plot functions of the figure scripts
+(image_compare.py, mask.py, lamba_compare.py, omega_compare.py,
+weight_compare.py and window_compare.py) from the cached arrays. They
+are written to ../Images/report/ and never over the paper figures in
+../Images/
+
+a cache file is named by its reconstruction spec and a hash of the
+PSF, the spec and the solver code (misc/processing.py and solve), so a
+changed PSF or solver is solved again instead of read from the cache"""
+
+import matplotlib
+matplotlib.use('Agg')
+import hashlib
+import inspect
+import numpy as np
+import os
+import pickle
+import time
+from functools import lru_cache
+from multiprocessing import Pool
+from pathlib import Path
+from matplotlib import pyplot as plt
+from tabulate import tabulate
+from sporco.admm import cbpdn
+from misc import processing
+import image_compare
+import lamba_compare
+import mask
+import omega_compare
+import weight_compare
+import window_compare
+
+# Module level constants
+eps = 1e-14
+rvmin, vmax = 5, 55  # dB
+CACHE_PATH = '../data/cache/'
+IMAGE_PATH = '../Images/report/'
+dpi = 800
+index = 400  # A-line of the line plots of lamba_compare.py and omega_compare.py
+
+# raw frame of window_compare.py
+RAW_PATH = '../data/finger(raw).npz'
+start, decimation_factor = 420, 20
+std = 1460 * 0.1  # gaussian window width 0.1
+
+
+@lru_cache(maxsize=None)
+def load(file_name):
+    '''dataset and PSF, loaded once per process'''
+    return processing.load_data(file_name, decimation_factor=20)
+
+
+@lru_cache(maxsize=None)
+def load_psf(file_name):
+    with open('../data/PSF/' + file_name, 'rb') as f:
+        return pickle.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_window():
+    '''the frame of window_compare.py without window, with a gaussian and
+    with a hann window'''
+    raw = processing.load_raw(RAW_PATH)
+    return (processing.mean_remove(processing.Aline_R(raw, start), decimation_factor),
+            processing.mean_remove(processing.Aline_G(raw, start, std), decimation_factor),
+            processing.mean_remove(processing.Aline_H(raw, start), decimation_factor))
+
+
+def weighted(file_name, lmbda, w_lmbda=0.05, speckle_weight=0.1):
+    '''reconstruction spec of make_sparse_representation'''
+    return ('weighted', file_name, lmbda, w_lmbda, speckle_weight, file_name == 'ear')
+
+
+def unweighted(file_name, lmbda, Maxiter=200):
+    '''reconstruction spec of a plain ConvBPDN solve'''
+    return ('unweighted', file_name, lmbda, Maxiter)
+
+
+def window(lmbda=0.028, w_lmbda=0.05, speckle_weight=0.1):
+    '''reconstruction spec of the hann windowed frame of window_compare.py'''
+    return ('window', 'finger', lmbda, w_lmbda, speckle_weight)
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    '''hash of the code that computes the cached arrays'''
+    source = Path(processing.__file__).read_bytes() + inspect.getsource(solve).encode()
+    return hashlib.sha1(source).hexdigest()
+
+
+def cache_file(spec):
+    key = hashlib.sha1(np.ascontiguousarray(load_psf(spec[1])).tobytes())
+    key.update(repr(spec).encode())
+    key.update(code_version().encode())
+    return Path(CACHE_PATH) / ('_'.join(str(v) for v in spec) + '_' + key.hexdigest()[:12] + '.npz')
+
+
+def solve(spec):
+    '''compute one reconstruction spec into the cache, returns the spec
+    and the solve time (0 when it was already cached)
+    '''
+    path = cache_file(spec)
+    if path.is_file():
+        return spec, 0.0
+
+    t = time.perf_counter()
+    if spec[0] == 'weighted':
+        _, file_name, lmbda, w_lmbda, speckle_weight, Ear = spec
+        s, D = load(file_name)
+        x, line, W = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight,
+                                                           Line=True, index=index, Mask=True, Ear=Ear)
+        arrays = {'x': x, 'line': line, 'W': W}
+    elif spec[0] == 'window':
+        _, file_name, lmbda, w_lmbda, speckle_weight = spec
+        s = load_window()[2]
+        arrays = {'x': processing.make_sparse_representation(s, load_psf(file_name), lmbda, w_lmbda,
+                                                             speckle_weight)}
+    else:
+        _, file_name, lmbda, Maxiter = spec
+        s, D = load(file_name)
+        l2f, snorm = processing.to_l2_normed(s)
+        opt_par = cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                          'MaxMainIter': Maxiter, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                          'RelaxParam': 1.515, 'AutoRho': {'Enabled': True}})
+        b = cbpdn.ConvBPDN(D, snorm, lmbda, opt=opt_par, dimK=1, dimN=1)
+        xnorm = np.roll(b.solve().squeeze() + eps, np.argmax(D), axis=0)
+        arrays = {'x': processing.from_l2_normed(xnorm, l2f),
+                  'r': processing.from_l2_normed(b.reconstruct().squeeze(), l2f)}
+    solve_time = time.perf_counter() - t
+
+    # write then rename, so a reader never sees a partial file
+    temp = path.with_suffix('.tmp.npz')
+    np.savez(temp, **arrays)
+    os.replace(temp, path)
+    return spec, solve_time
+
+
+def get(spec):
+    '''cached arrays of a reconstruction spec'''
+    with np.load(cache_file(spec)) as f:
+        return {key: f[key] for key in f.files}
+
+
+def to_log(x):
+    return 20 * np.log10(abs(x))
+
+
+def line(s):
+    '''the l2 normed A-line index of s'''
+    return abs(processing.to_l2_normed(s)[1][:, index])
+
+
+# parameters of the figure scripts
+image_lmbda = [0.05, 0.03, 0.02, 0.04]
+mask_lmbda = 0.04
+lambdas = [1e-5, 0.01, 0.05, 0.10, 0.15, 0.4]
+speckle_weights = [0.001, 0.05, 0.1, 0.5, 1]
+
+
+def build_image_compare():
+    original = [to_log(load(f)[0]) for f in image_compare.file_name]
+    sparse = [to_log(get(weighted(f, l))['x']) for f, l in zip(image_compare.file_name, image_lmbda)]
+    return image_compare.plot(original, sparse, image_lmbda, 0.1, rvmin, vmax)
+
+
+def build_mask():
+    results = [get(weighted(f, mask_lmbda)) for f in mask.file_name]
+    original = [to_log(load(f)[0]) for f in mask.file_name]
+    return mask.plot(original, [to_log(r['x']) for r in results], [r['W'] for r in results],
+                     mask_lmbda, 0.1, rvmin, vmax)
+
+
+def build_lambda_compare():
+    s, _ = load('ear')
+    results = [get(weighted('ear', l)) for l in lambdas]
+    r0_log = np.stack([processing.display_range(to_log(get(unweighted('ear', l, Maxiter=20))['r']), rvmin, vmax)
+                       for l in lambdas], axis=-1)
+    sparse = np.stack([processing.display_range(to_log(r['x']), rvmin, vmax) for r in results], axis=-1)
+    x_line = np.stack([r['line'] for r in results], axis=-1)
+    return lamba_compare.plot(to_log(s), r0_log, sparse, line(s), x_line, lambdas, 0.1, index, rvmin, vmax)
+
+
+def build_omega_compare():
+    s, _ = load('ear')
+    results = [get(weighted('ear', 0.05, speckle_weight=w)) for w in speckle_weights]
+    sparse = np.stack([to_log(r['x']) for r in results], axis=-1)
+    x_line = np.stack([r['line'] for r in results], axis=-1)
+    return omega_compare.plot(to_log(s), sparse, line(s), x_line, 0.05, speckle_weights, index, rvmin, vmax)
+
+
+def build_weight_compare():
+    s, D = load('ear')
+    plain = get(unweighted('ear', 0.05))
+    result = get(weighted('ear', 0.05))
+    x0_log = to_log(plain['x'])
+    return weight_compare.plot_images(weight_compare.title_name,
+                                      [to_log(s), abs(D), to_log(plain['r']), x0_log, x0_log,
+                                       to_log(result['x']), result['W']],
+                                      rvmin, vmax, overlays=True)
+
+
+def build_window_compare(nrows=1, ncols=4):
+    lmbda, speckle_weight = window()[2], window()[4]
+    frames = list(load_window()) + [get(window())['x']]
+    titles = ['(a) no window', '(b) Gaussian window', '(c) Hann window',
+              r'(d) $𝜆$ = %.2f,$W$ = %.1f' % (lmbda, speckle_weight)]
+    return window_compare.plot([to_log(x) for x in frames], [abs(x) ** 2 for x in frames], titles,
+                               nrows=nrows, ncols=ncols)
+
+
+def build_window_compare_update():
+    # the 2 x 3 layout of window_compare_update.py
+    return build_window_compare(nrows=2, ncols=3)
+
+
+# figure name: (builder, reconstructions it needs, output file, rcParams of its script)
+figures = {'image_compare': (build_image_compare, [weighted(f, l) for f, l in zip(image_compare.file_name, image_lmbda)],
+                             'image_compare.jpeg', image_compare.rc_params),
+           'mask': (build_mask, [weighted(f, mask_lmbda) for f in mask.file_name], 'mask.svg', mask.rc_params),
+           'lambda_compare': (build_lambda_compare,
+                              [weighted('ear', l) for l in lambdas] +
+                              [unweighted('ear', l, Maxiter=20) for l in lambdas],
+                              'lambda_compare.jpeg', lamba_compare.rc_params),
+           'omega_compare': (build_omega_compare,
+                             [weighted('ear', 0.05, speckle_weight=w) for w in speckle_weights],
+                             'omega_compare.jpeg', omega_compare.rc_params),
+           'weight_compare': (build_weight_compare, [unweighted('ear', 0.05), weighted('ear', 0.05)],
+                              'weighted.jpeg', weight_compare.rc_params),
+           'window_compare': (build_window_compare, [window()], 'window_compare.jpeg', window_compare.rc_params),
+           'window_compare_update': (build_window_compare_update, [window()], 'window_compare_update.jpeg',
+                                     window_compare.rc_params)}
+
+
+def render(name):
+    '''build and save one figure, returns its name and render time'''
+    np.seterr(divide='ignore')
+    builder, _, file_name, rc_params = figures[name]
+    matplotlib.rcParams.update(matplotlib.rcParamsDefault)
+    matplotlib.rcParams.update(rc_params)
+
+    t = time.perf_counter()
+    fig = builder()
+    fig.savefig(Path(IMAGE_PATH) / file_name, dpi=dpi, transparent=True, format=file_name.split('.')[-1])
+    plt.close(fig)
+    return name, time.perf_counter() - t
+
+
+if __name__ == '__main__':
+
+    names = list(figures)
+    processes = os.cpu_count()
+
+    # every reconstruction once, however many figures use it
+    specs = list(dict.fromkeys(spec for name in names for spec in figures[name][1]))
+    Path(CACHE_PATH).mkdir(parents=True, exist_ok=True)
+    Path(IMAGE_PATH).mkdir(parents=True, exist_ok=True)
+
+    t = time.perf_counter()
+    with Pool(processes) as pool:
+        solved = pool.map(solve, specs)
+        solve_wall = time.perf_counter() - t
+
+        t = time.perf_counter()
+        rendered = pool.map(render, names)
+        render_wall = time.perf_counter() - t
+
+    table = [[' '.join(str(v) for v in spec), 'solve', '%.2f' % dt if dt else 'cached'] for spec, dt in solved]
+    table += [[name, 'render', '%.2f' % dt] for name, dt in rendered]
+    print(tabulate(table, headers=['task', 'stage', 'time [s]'], tablefmt='fancy_grid', numalign='right'))
+
+    print('%d reconstructions for %d figures, solve: %.2f s, render: %.2f s (wall, %d processes)'
+          % (len(specs), len(names), solve_wall, render_wall, processes))
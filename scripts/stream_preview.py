@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-19 5:55 p.m.
+# @Author  : young wang
+# @FileName: stream_preview.py
+# @Software: PyCharm
+
+"""this script feeds the ear dataset to the line-by-line streaming
+deconvolution one A-line at a time, as in a live preview, and reports
+the throughput, the latency in lines and the difference to the full
+frame reconstruction"""
+
+import numpy as np
+import time
+from misc import processing, streaming
+
+if __name__ == '__main__':
+
+    s, D = processing.load_data('ear', decimation_factor=20)
+    speckle_weight = 0.1
+    lmbda = 0.05
+    w_lmbda = 0.05
+
+    stream = streaming.LineStream(D, lmbda, w_lmbda, speckle_weight, block=32, Ear=True)
+
+    t = time.perf_counter()
+    x_stream = np.stack(list(stream.run(s.T)), axis=1)
+    stream_time = time.perf_counter() - t
+
+    x = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight, Ear=True)
+
+    print('throughput: %.0f A-lines/s' % (s.shape[1] / stream_time))
+    print('latency: %d A-lines' % stream.latency)
+    print('relative difference to the full frame: %.2e' % (np.linalg.norm(x_stream - x) / np.linalg.norm(x)))
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-21 9:30 a.m.
+# @Author  : young wang
+# @FileName: test_processing.py
+# @Software: PyCharm
+
+"""checks of misc.processing on synthetic frames, run with
+python -m pytest -q from this folder"""
+
+import warnings
+import numpy as np
+from pathlib import Path
+from misc import processing, synthetic
+
+# Module level constants
+D_PATH = Path(__file__).resolve().parent.parent / 'data' / 'PSF'
+lmbda, w_lmbda, speckle_weight = 0.05, 0.05, 0.1
+
+warnings.simplefilter('ignore')
+
+
+def speckle_frame(seed=3):
+    '''a narrow ear frame whose speckle layer gets a speckle_weight mask'''
+    D = synthetic.load_psf('ear', D_PATH=D_PATH)
+    s, x = synthetic.frame(D, width=128, speckle_level=50, seed=seed)
+    return D, s, x
+
+
+def test_depth_bands_of_one_psf():
+    # the same PSF in every band is the single-PSF problem, so the
+    # solutions agree to the solver tolerance
+    D, s, x = speckle_frame()
+    x_full = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight)
+    x_bands = processing.make_depth_sparse_representation(s, [D] * 3, lmbda, w_lmbda, speckle_weight)
+
+    assert np.linalg.norm(x_bands - x_full) / np.linalg.norm(x_full) < 5e-3
+    assert abs(synthetic.relative_error(x_bands, x) - synthetic.relative_error(x_full, x)) < 1e-3
+
+
+def options(max_iterations, W=1.0):
+    from sporco.admm import cbpdn
+    return cbpdn.ConvBPDN.Options({'FastSolve': True, 'Verbose': False, 'StatusHeader': False,
+                                   'MaxMainIter': max_iterations, 'RelStopTol': 5e-5, 'AuxVarObj': True,
+                                   'RelaxParam': 1.515, 'L1Weight': W, 'AutoRho': {'Enabled': True}})
+
+
+def rolled_reference(s, D, index):
+    '''make_sparse_representation(..., Line=True, index=index, Mask=True)
+    as it was written before centred_psf, with the uncentred PSF and
+    np.roll of the mask and of the code by np.argmax(D)
+    '''
+    from sporco.admm import cbpdn
+    l2f, snorm = processing.to_l2_normed(s)
+    W = processing.getWeight(s, D, w_lmbda, speckle_weight, opt_par=options(20))
+    W = np.roll(W, np.argmax(D), axis=0)
+
+    b = cbpdn.ConvBPDN(D, snorm, lmbda, opt=options(200, W), dimK=1, dimN=1)
+    xnorm = np.roll(b.solve().squeeze() + processing.eps, np.argmax(D), axis=0)
+    return xnorm * l2f, abs(xnorm[:, index]), np.roll(W, -np.argmax(D), axis=0).squeeze()
+
+
+def test_centred_psf_matches_rolled_codes():
+    from sporco.admm import cbpdn
+    D, s, _ = speckle_frame()
+    _, snorm = processing.to_l2_normed(s)
+    D_centred, shift = processing.centred_psf(D)
+
+    x = cbpdn.ConvBPDN(D, snorm, w_lmbda, opt=options(20), dimK=1, dimN=1).solve().squeeze()
+    x_centred = cbpdn.ConvBPDN(D_centred, snorm, w_lmbda, opt=options(20), dimK=1, dimN=1).solve().squeeze()
+    assert shift == np.argmax(D)
+    assert np.allclose(x_centred, np.roll(x, shift, axis=0), rtol=0, atol=1e-10)
+
+
+def test_roll_add():
+    a = np.arange(12.0).reshape(6, 2)
+    for shift in [0, 2, 6, 9, -1]:
+        assert np.array_equal(processing.roll_add(a, shift, 0.5), np.roll(a, shift, axis=0) + 0.5)
+
+
+def test_sparse_representation_matches_rolled_reference():
+    D, s, _ = speckle_frame()
+    x_ref, line_ref, mask_ref = rolled_reference(s, D, index=5)
+
+    x = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight)
+    x_all, line, mask = processing.make_sparse_representation(s, D, lmbda, w_lmbda, speckle_weight,
+                                                              Line=True, index=5, Mask=True)
+    scale = abs(x_ref).max()
+    assert np.allclose(x, x_ref, rtol=0, atol=1e-10 * scale)
+    assert np.allclose(x_all, x_ref, rtol=0, atol=1e-10 * scale)
+    assert np.allclose(line, line_ref, rtol=0, atol=1e-10)
+    assert np.array_equal(mask, mask_ref)
+
+
+def test_log_uint8_intensity_sign():
+    vmin, vmax = 5, 55
+    lut = processing.display_lut(vmin, vmax)
+    p = np.array([-0.0, 0.0, -1e-12, -1e6, 1e-12, 1.0, 10 ** 3.1, 1e6])
+    with np.errstate(divide='ignore'):
+        ref = processing.imag2uint(10 * np.log10(np.maximum(p, 0)), vmin, vmax)
+    for table in [None, lut]:
+        assert np.array_equal(processing.log_uint8(p, vmin, vmax, lut=table, intensity=True), ref)
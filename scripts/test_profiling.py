@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-21 2:00 p.m.
+# @Author  : young wang
+# @FileName: test_profiling.py
+# @Software: PyCharm
+
+"""checks of misc.profiling, run with python -m pytest -q from this folder"""
+
+import numpy as np
+from misc import profiling
+from misc.profiling import Profile
+
+
+def test_nested_stage_keeps_parent_peak():
+    # an 80 MB transient of the outer stage, freed before an inner stage starts
+    with Profile(memory=True) as prof:
+        with profiling.stage('outer'):
+            transient = np.ones(10 * 2 ** 20)
+            del transient
+            with profiling.stage('inner'):
+                np.ones(1024)
+
+    outer, inner = prof.records
+    assert outer['peak'] >= 80 * 2 ** 20
+    assert inner['peak'] < 2 ** 20
+
+
+def test_solver_log_frames():
+    import warnings
+    from pathlib import Path
+    from misc import processing, psf_bank, synthetic
+    warnings.simplefilter('ignore')
+    D = synthetic.load_psf('ear', D_PATH=Path(__file__).resolve().parent.parent / 'data' / 'PSF')
+    s, _ = synthetic.frame(D, width=96, seed=0)
+    bank = psf_bank.PSFBank.from_arrays(['ear', 'flipped'], [D, np.conj(D)])
+
+    with profiling.SolverLog() as log:
+        processing.make_sparse_representation(s, D, 0.05, 0.05, 0.1)
+        processing.make_tiled_sparse_representation(s, D, 0.05, 0.05, 0.1, tile_width=48)
+        processing.make_tiled_sparse_representation(s, D, 0.05, 0.05, 0.1, tile_width=48, processes=2)
+        processing.make_depth_sparse_representation(s, [D, D], 0.05, 0.05, 0.1)
+        bank.deconvolve(s, 0.05, 0.05, 0.1, block_width=32)
+
+    summary = log.summary()
+    # one weight and one weighted solve per frame, tile and run; every
+    # call is one frame
+    assert log.n_frames == 5
+    assert summary['weighted solve']['frames'] == 5
+    assert summary['weight solve']['solves'] == summary['weighted solve']['solves']
+    assert summary['weighted solve']['solves'] >= 1 + 2 + 2 + 1 + 1
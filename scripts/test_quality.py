@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2026-10-21 10:15 a.m.
+# @Author  : young wang
+# @FileName: test_quality.py
+# @Software: PyCharm
+
+"""checks of misc.quality, run with python -m pytest -q from this folder"""
+
+import numpy as np
+from misc import quality
+
+
+def test_local_stats_dark_windows():
+    # speckle whose top rows are 70 dB brighter than the rest of the frame
+    rng = np.random.default_rng(0)
+    s = rng.exponential(1.0, (330, 512))
+    s[:120] *= 1e7
+    width, height = 16, 12
+
+    mean, std = quality.local_stats(s, width, height)
+    for y in [0, 110, 115, 140, 200, 330 - height]:
+        for x in [0, 37, 512 - width]:
+            roi = quality.ROI(x, y, width, height, s)
+            assert abs(mean[y, x] - np.mean(roi)) <= 1e-12 * np.mean(roi)
+            assert abs(std[y, x] - np.std(roi)) <= 1e-10 * np.std(roi)
+
+
+def test_moving_sum():
+    a = np.random.default_rng(1).standard_normal((23, 3))
+    for n in [1, 4, 5, 23]:
+        ref = np.array([a[i:i + n].sum(axis=0) for i in range(23 - n + 1)])
+        assert np.allclose(quality.moving_sum(a, n), ref, rtol=0, atol=1e-12)
+        assert np.allclose(quality.moving_sum(a.T, n, axis=1), ref.T, rtol=0, atol=1e-12)
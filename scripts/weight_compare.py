@@ -16,6 +16,19 @@ from misc import processing
 
 # Module level constants
 eps = 1e-14
+rc_params = {'font.size': 20, 'text.usetex': False, 'font.family': 'sans-serif', 'mathtext.fontset': 'stix'}
+title_name = [r'(a) reference',
+              r'(b) magnitude of learned PSF $d(z)$',
+              # '\n'.join((r'(c) sparse estimate image', r'$𝜆$ = %.2f' % (lmbda))),
+              r'(c) sparse estimate image',
+              '\n'.join((r'(d) sparse vector image', r'wo/weighting')),
+              # '\n'.join((r'(d) sparse vector image', r'wo/weighting ($𝜆$ = %.2f)' % (lmbda))),
+              # '\n'.join((r'(e) sparse vector weighting overlay image', r'wo/weighting ($𝜆$ = %.2f)' % (lmbda))),
+              '\n'.join((r'(e) sparse vector image', r'wo/weighting with segmentation')),
+              '\n'.join((r'(f) sparse vector image', r'w/weighting'))]
+
+# '\n'.join((r'(e) sparse vector image showing segmentation', r'for calculation of weighting $W(z)$')),
+#          '\n'.join((r'(f) sparse vector image', r'w/weighting ($𝜆$ = %.2f,$W$ = %.1f)' %  (lmbda, speckle_weight)))]
 
 
 def plot_images(plot_titles, image,
@@ -112,23 +125,12 @@ def plot_images(plot_titles, image,
 
 
     plt.tight_layout(pad=0.5)
-    plt.show()
-    #
-    fig.savefig('../Images/weighted.jpeg',
-                dpi = 800,
-                transparent=True,format = 'jpeg')
+    return fig
 
 if __name__ == '__main__':
     plt.close('all')
     # Customize matplotlib params
-    matplotlib.rcParams.update(
-        {
-            'font.size': 20,
-            'text.usetex': False,
-            'font.family': 'sans-serif',
-            'mathtext.fontset': 'stix',
-        }
-    )
+    matplotlib.rcParams.update(rc_params)
     file_name = ['ear']
     # Load the example dataset
     s, D = processing.load_data(file_name[0], decimation_factor=20)
@@ -166,18 +168,10 @@ if __name__ == '__main__':
     x1, W = processing.make_sparse_representation(s, D, lmbda,w_lmbda, speckle_weight, Mask=True, Ear=True)
     x1_log = 20 * np.log10(abs(x1))
 
-    title = [r'(a) reference',
-             r'(b) magnitude of learned PSF $d(z)$',
-             # '\n'.join((r'(c) sparse estimate image', r'$𝜆$ = %.2f' % (lmbda))),
-             r'(c) sparse estimate image',
-             '\n'.join((r'(d) sparse vector image', r'wo/weighting')),
-             # '\n'.join((r'(d) sparse vector image', r'wo/weighting ($𝜆$ = %.2f)' % (lmbda))),
-             # '\n'.join((r'(e) sparse vector weighting overlay image', r'wo/weighting ($𝜆$ = %.2f)' % (lmbda))),
-             '\n'.join((r'(e) sparse vector image', r'wo/weighting with segmentation')),
-             '\n'.join((r'(f) sparse vector image', r'w/weighting'))]
-
-    # '\n'.join((r'(e) sparse vector image showing segmentation', r'for calculation of weighting $W(z)$')),
-    #          '\n'.join((r'(f) sparse vector image', r'w/weighting ($𝜆$ = %.2f,$W$ = %.1f)' %  (lmbda, speckle_weight)))]
-
-    plot_images(title, [s_log, abs(D), r0_log,x0_log,
-                        x0_log, x1_log, W], rvmin, vmax, overlays=True)
+    fig = plot_images(title_name, [s_log, abs(D), r0_log,x0_log,
+                                   x0_log, x1_log, W], rvmin, vmax, overlays=True)
+    plt.show()
+    #
+    fig.savefig('../Images/weighted.jpeg',
+                dpi = 800,
+                transparent=True,format = 'jpeg')
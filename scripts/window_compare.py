@@ -151,7 +151,7 @@ def anote(ax,s,median_flag =False):
 
     if median_flag == True:
 
-        textstr =r'${gCNR_{{H_2}/{A}}}$: %.2f' % (quality.log_gCNR(h2, ar,improvement=True))
+        textstr =r'${gCNR_{{H_2}/{A}}}$: %.2f' % (quality.median_gCNR(s, roi['homogeneous'][0], roi['artifact'][0]))
     else:
         textstr = '\n'.join((
             r'${SNR_{{H_2}/B}}$: %.1f $dB$' % (quality.SNR(h2, ba)),
@@ -206,24 +206,39 @@ roi['homogeneous'] = [[390, 230, int(width * 1.2), int(height * 1.2)]]
 
 # Module level constants
 eps = 1e-14
+rc_params = {'font.size': 16, 'text.usetex': False, 'font.family': 'sans-serif', 'mathtext.fontset': 'stix'}
 legend_font = 20
 bins = 32
+rvmin, vmax = 5, 55  # dB
+
+
+def plot(images, intensities, titles, nrows=1, ncols=4):
+    '''the figure of the log images, one panel each with the zoomed
+    artifact and homogeneous regions and the SNR and gCNR of its
+    intensity image'''
+    fig = plt.figure(figsize=(16, 9),constrained_layout=True)
+
+    gs = fig.add_gridspec(ncols=ncols, nrows=nrows)
+
+    for i in range(len(images)):
+        ax = fig.add_subplot(gs[i])
+        ax.set_title(titles[i])
+
+        ax.imshow(images[i], 'gray', aspect=images[i].shape[1] / images[i].shape[0],
+                  vmax=vmax, vmin=rvmin, interpolation='none')
+        zoomshow(ax, images[i])
+        anote(ax, intensities[i])
+    return fig
+
+
 if __name__ == '__main__':
     t = time.process_time()
     # Image processing and display paramaters
     speckle_weight = 0.1
-    rvmin, vmax = 5, 55  # dB
 
     plt.close('all')
     # Customize matplotlib params
-    matplotlib.rcParams.update(
-        {
-            'font.size': 16,
-            'text.usetex': False,
-            'font.family': 'sans-serif',
-            'mathtext.fontset': 'stix',
-        }
-    )
+    matplotlib.rcParams.update(rc_params)
 
     start, decimation_factor = 420, 20
     # gaussian std
@@ -278,46 +293,9 @@ if __name__ == '__main__':
     ba_s = quality.ROI(*roi['background'][0], s_intensity)
     ba_x = quality.ROI(*roi['background'][0], x_intensity)
 
-    fig = plt.figure(figsize=(16, 9),constrained_layout=True)
-
-    gs = fig.add_gridspec(ncols=4, nrows=1)
-
-    ax = fig.add_subplot(gs[0])
-    ax.set_title('(a) no window')
-
-    ax.imshow(sr_log, 'gray', aspect=sr_log.shape[1] / sr_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-    zoomshow(ax,sr_log)
-
-    anote(ax,sr_intensity)
-
-    ax = fig.add_subplot(gs[1])
-    ax.set_title('(b) Gaussian window')
-
-    ax.imshow(sg_log, 'gray', aspect=sg_log.shape[1] / sg_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-
-    zoomshow(ax, sg_log)
-    anote(ax,sg_intensity)
-
-    ax = fig.add_subplot(gs[2])
-    ax.set_title('(c) Hann window')
-
-    ax.imshow(s_log, 'gray', aspect=s_log.shape[1] / s_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-
-    zoomshow(ax, s_log)
-    anote(ax,s_intensity)
-    
-    ax = fig.add_subplot(gs[3])
-    textstr = r'(d) $𝜆$ = %.2f,$W$ = %.1f' % (lmbda,speckle_weight)
-    ax.set_title(textstr)
-
-    ax.imshow(x_log, 'gray', aspect=x_log.shape[1] / x_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-
-    zoomshow(ax, x_log)
-    anote(ax,x_intensity)
+    titles = ['(a) no window', '(b) Gaussian window', '(c) Hann window',
+              r'(d) $𝜆$ = %.2f,$W$ = %.1f' % (lmbda,speckle_weight)]
+    fig = plot([sr_log, sg_log, s_log, x_log], [sr_intensity, sg_intensity, s_intensity, x_intensity], titles)
     plt.show()
 
     elapsed_time = time.process_time() - t
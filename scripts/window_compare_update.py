@@ -13,6 +13,7 @@ from sporco.admm import cbpdn, ccmod
 from sporco import cnvrep
 import pickle
 import time
+from window_compare import roi, plot
 from OssiviewBufferReader import OssiviewBufferReader
 from numpy.fft import fft, ifft
 import scipy.signal as signal
@@ -77,145 +78,13 @@ def get_PSF(s, lmbda):
     D1 = D1.reshape(-1, 1)
     return D1
 
-def gCNRPlot(r1, r2, min, max,ax,median_flag = False,y_flag = False):
-
-    region_r1 = np.ravel(r1)
-    region_r2 = np.ravel(r2)
-
-    if median_flag == True:
-        log_r1 = processing.imag2uint(region_r1, min, max)
-        log_r2 = processing.imag2uint(region_r2, min, max)
-    else:
-        log_r1 = processing.imag2uint(10 * np.log10(region_r1), min, max)
-        log_r2 = processing.imag2uint(10 * np.log10(region_r2), min, max)
-
-    weights = np.ones_like(log_r1) / float(len(log_r1))
-
-    ax.hist(log_r1, bins=bins, range=(0, 255), weights=weights, histtype='step', label=r'${H_2}$')
-
-    ax.hist(log_r2, bins=bins, range=(0, 255), weights=weights, histtype='step', label=r'${A}$')
-
-    ax.legend()
-    ax.set_ylim(0,1.05)
-
-    if y_flag == True:
-        ax.set_ylabel('pixel percentage',fontsize=20)
-        y_vals = ax.get_yticks()
-        ax.set_yticklabels(['{:d}%'.format(int(x*100)) for x in y_vals])
-        pass
-    else:
-        ax.set_yticks([])
-        ax.set_ylabel('')
-
-    return ax
-
-def anote(ax,s,median_flag =False):
-
-    text = r'${A}$'
-    ax.annotate(text, xy=(roi['artifact'][0][0], roi['artifact'][0][1]), xycoords='data',
-                xytext=(roi['artifact'][0][0] - 100, roi['artifact'][0][1] - 45), textcoords='data', fontsize=legend_font,
-                color='white', fontname='Arial',
-                arrowprops=dict(facecolor='white', shrink=0.025),
-                horizontalalignment='left', verticalalignment='top')
-
-    text = r'${H_{2}}$'
-    ax.annotate(text, xy=(roi['homogeneous'][0][0], roi['homogeneous'][0][1] + height), xycoords='data',
-                xytext=(roi['homogeneous'][0][0] - 55, roi['homogeneous'][0][1]+height+8), textcoords='data', fontsize=legend_font,
-                color='white', fontname='Arial',
-                arrowprops=dict(facecolor='white', shrink=0.025),
-                horizontalalignment='right', verticalalignment='top')
-
-    text = r'${B}$'
-    ax.annotate(text, xy=(roi['background'][0][0] + width, roi['background'][0][1] + height), xycoords='data',
-                xytext=(roi['background'][0][0] + 2 * width, roi['background'][0][1] + 40), textcoords='data',
-                fontsize=legend_font,
-                color='white', fontname='Arial',
-                arrowprops=dict(facecolor='white', shrink=0.025),
-                horizontalalignment='left', verticalalignment='top')
-
-    ax.set_axis_off()
-
-    for i in range(len(roi['artifact'])):
-        for j in annotation.get_artifact(*roi['artifact'][i]):
-            ax.add_patch(j)
-
-    for i in range(len(roi['homogeneous'])):
-        for j in annotation.get_homogeneous(*roi['homogeneous'][i]):
-            ax.add_patch(j)
-
-    for i in range(len(roi['background'])):
-        for j in annotation.get_background(*roi['background'][i]):
-            ax.add_patch(j)
-
-
-    h2 = quality.ROI(*roi['homogeneous'][0], s)
-    ba = quality.ROI(*roi['background'][0], s)
-    ar = quality.ROI(*roi['artifact'][0], s)
-
-    if median_flag == True:
-
-        textstr =r'${gCNR_{{H_2}/{A}}}$: %.2f' % (quality.log_gCNR(h2, ar,improvement=True))
-    else:
-        textstr = '\n'.join((
-            r'${SNR_{{H_2}/B}}$: %.1f $dB$' % (quality.SNR(h2, ba)),
-            r'${gCNR_{{H_2}/{A}}}$: %.2f' % (quality.log_gCNR(h2, ar,improvement=False))))
-    ax.text(0.02, 0.98, textstr, transform=ax.transAxes, fontsize=legend_font,
-            verticalalignment='top', fontname='Arial', color='white')
-    return ax
-
-def zoomshow(ax,image):
-    zoom_factor = 10
-    axins = ax.inset_axes([300, 40, width*zoom_factor, height*zoom_factor], transform=ax.transData)
-    axins.imshow(image, cmap='gray', vmax=vmax, vmin=rvmin, interpolation='none')
-    axins.set_xticklabels('')
-    axins.set_yticklabels('')
-
-    axins.spines['left'].set_color('green')
-    axins.spines['right'].set_color('green')
-    axins.spines['top'].set_color('green')
-    axins.spines['bottom'].set_color('green')
-
-    x1,x2 =roi['artifact'] [0][0], int(roi['artifact'] [0][0]+width)
-    y1,y2 =roi['artifact'] [0][1], int(roi['artifact'] [0][1]+height)
-
-    axins.set_xlim(x1, x2)
-    axins.set_ylim(y1, y2)
-    ax.indicate_inset_zoom(axins, edgecolor='green')
-
-    axins = ax.inset_axes([10, 235, width*zoom_factor, height*zoom_factor], transform=ax.transData)
-    axins.imshow(image, cmap='gray', vmax=vmax, vmin=rvmin, interpolation='none')
-    axins.set_xticklabels('')
-    axins.set_yticklabels('')
-
-    axins.spines['left'].set_color('red')
-    axins.spines['right'].set_color('red')
-    axins.spines['top'].set_color('red')
-    axins.spines['bottom'].set_color('red')
-
-    x1, x2 = roi['homogeneous'][0][0], int(roi['homogeneous'][0][0] + width)
-    y1, y2 = roi['homogeneous'][0][1], int(roi['homogeneous'][0][1] + height)
-
-    axins.set_xlim(x1, x2)
-    axins.set_ylim(y1, y2)
-    ax.indicate_inset_zoom(axins, edgecolor='red')
-    return ax
-
-# Define ROIs
-roi = {}
-width, height = (20, 10)
-roi['artifact'] = [[170, 144, int(width * 1.2), int(height * 1.2)]]
-roi['background'] = [[390, 260, int(width * 1.2), int(height * 1.2)]]
-roi['homogeneous'] = [[390, 230, int(width * 1.2), int(height * 1.2)]]
-
 # Module level constants
 eps = 1e-14
-legend_font = 20
-bins = 32
+
 if __name__ == '__main__':
     t = time.process_time()
     # Image processing and display paramaters
     speckle_weight = 0.1
-    rvmin, vmax = 5, 55  # dB
 
     plt.close('all')
     # Customize matplotlib params
@@ -281,46 +150,10 @@ if __name__ == '__main__':
     ba_s = quality.ROI(*roi['background'][0], s_intensity)
     ba_x = quality.ROI(*roi['background'][0], x_intensity)
 
-    fig = plt.figure(figsize=(16, 9),constrained_layout=True)
-
-    gs = fig.add_gridspec(ncols=3, nrows=2)
-
-    ax = fig.add_subplot(gs[0])
-    ax.set_title('(a) no window')
-
-    ax.imshow(sr_log, 'gray', aspect=sr_log.shape[1] / sr_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-    zoomshow(ax,sr_log)
-
-    anote(ax,sr_intensity)
-
-    ax = fig.add_subplot(gs[1])
-    ax.set_title('(b) Gaussian window')
-
-    ax.imshow(sg_log, 'gray', aspect=sg_log.shape[1] / sg_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-
-    zoomshow(ax, sg_log)
-    anote(ax,sg_intensity)
-
-    ax = fig.add_subplot(gs[2])
-    ax.set_title('(c) Hann window')
-
-    ax.imshow(s_log, 'gray', aspect=s_log.shape[1] / s_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-
-    zoomshow(ax, s_log)
-    anote(ax,s_intensity)
-    
-    ax = fig.add_subplot(gs[3])
-    textstr = r'(d) $𝜆$ = %.2f,$W$ = %.1f' % (lmbda,speckle_weight)
-    ax.set_title(textstr)
-
-    ax.imshow(x_log, 'gray', aspect=x_log.shape[1] / x_log.shape[0],
-              vmax=vmax, vmin=rvmin, interpolation='none')
-
-    zoomshow(ax, x_log)
-    anote(ax,x_intensity)
+    titles = ['(a) no window', '(b) Gaussian window', '(c) Hann window',
+              r'(d) $𝜆$ = %.2f,$W$ = %.1f' % (lmbda,speckle_weight)]
+    fig = plot([sr_log, sg_log, s_log, x_log], [sr_intensity, sg_intensity, s_intensity, x_intensity], titles,
+               nrows=2, ncols=3)
     plt.show()
 
     elapsed_time = time.process_time() - t